@@ -1,5 +1,39 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+
+def install_search_index(sender, using, **kwargs):
+    from . import passages, search
+
+    connection = connections[using]
+    tables = connection.introspection.table_names()
+    if "bio_person" in tables:
+        search.install_index(connection)
+    if "bio_chatpassage" in tables:
+        passages.install_index(connection)
 
 
 class BioConfig(AppConfig):
     name = "bio"
+
+    def ready(self):
+        from django.apps import apps
+
+        from core.db import configure_sqlite
+
+        from . import signals
+
+        connection_created.connect(configure_sqlite)
+        post_migrate.connect(install_search_index, sender=self)
+        LifeEvent = self.get_model("LifeEvent")
+        Evidence = self.get_model("Evidence")
+        Comment = apps.get_model("comment", "Comment")
+        for signal in (post_save, post_delete):
+            signal.connect(signals.life_event_changed, sender=LifeEvent)
+            signal.connect(signals.evidence_changed, sender=Evidence)
+            signal.connect(signals.comment_changed, sender=Comment)
+        Person = self.get_model("Person")
+        post_save.connect(signals.person_saved, sender=Person)
+        post_delete.connect(signals.person_deleted, sender=Person)
@@ -0,0 +1,99 @@
+"""
+Streaming replies for ``bio_chat``.
+
+A responder is an async generator function called as
+``responder(person, message, passages, history)`` that yields the reply in
+pieces (tokens) as they are produced. ``passages`` are the ``ChatPassage``
+rows most relevant to the message (see ``bio.passages``), best first, for
+grounding the reply. ``history`` is a ``ChatHistory`` of the conversation so
+far: the running summary of older turns and the recent turns, ending with the
+message being answered. Its size is capped by ``CHAT_HISTORY_TURNS`` and
+``CHAT_SUMMARY_LENGTH`` however long the conversation gets.
+
+``CHAT_RESPONDER`` names the responder to use; the default ``stub_responder``
+needs no model and just streams a canned reply, so the page and protocol can
+be developed and tested locally.
+
+``stream_reply`` turns a responder's output into Server-Sent Events:
+
+* ``event: token`` with ``{"text": ...}`` for every piece,
+* ``event: done`` once the reply is complete,
+* ``event: error`` with ``{"message": ...}`` if the responder failed.
+"""
+
+import asyncio
+import json
+import logging
+from typing import NamedTuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .passages import retrieve_passages
+
+logger = logging.getLogger(__name__)
+
+
+class ChatHistory(NamedTuple):
+    summary: str
+    turns: list
+
+
+def get_responder():
+    return import_string(getattr(settings, "CHAT_RESPONDER", "bio.chat.stub_responder"))
+
+
+async def stub_responder(person, message, passages, history):
+    """
+    Stream a fixed reply word by word, ``CHAT_STUB_DELAY`` seconds apart,
+    quoting the most relevant passage if there is one.
+    """
+    delay = getattr(settings, "CHAT_STUB_DELAY", 0.05)
+    reply = f"{person.name}: “{message}”에 대해 이야기해 볼까요?"
+    if passages:
+        reply += f" {passages[0].text}"
+    for i, word in enumerate(reply.split(" ")):
+        if delay:
+            await asyncio.sleep(delay)
+        yield word if i == 0 else f" {word}"
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Event; ``data`` is sent as JSON."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _begin_turn(session, message):
+    session.add_turn("user", message)
+    return ChatHistory(session.summary, session.recent_turns())
+
+
+async def stream_reply(person, message, session=None):
+    """
+    Yield the SSE stream of ``person``'s reply to ``message``.
+
+    With a ``ChatSession`` the message and the completed reply are stored as
+    turns of it; a failed reply is not stored.
+    """
+    responder = get_responder()
+    reply = []
+    try:
+        if session is None:
+            history = ChatHistory("", [])
+        else:
+            history = await sync_to_async(_begin_turn)(session, message)
+        passages = await sync_to_async(retrieve_passages)(
+            person, message, getattr(settings, "CHAT_PASSAGES", 5)
+        )
+        async for token in responder(person, message, passages, history):
+            if token:
+                reply.append(token)
+                yield sse_event("token", {"text": token})
+    except Exception:
+        logger.exception("Chat responder failed for %s", person.slug)
+        yield sse_event("error", {"message": "응답을 생성하지 못했습니다."})
+        return
+    if session is not None:
+        await sync_to_async(session.add_turn)("assistant", "".join(reply))
+    yield sse_event("done", {})
@@ -0,0 +1,210 @@
+"""
+PersonClick ingestion.
+
+Clicks are recorded either synchronously (one INSERT per page view) or through
+an in-process buffer that is flushed with ``bulk_create`` once it reaches
+``CLICK_BUFFER_SIZE`` entries or its oldest entry is older than
+``CLICK_FLUSH_INTERVAL`` seconds. The buffer is per worker process and is also
+flushed when the process exits.
+
+Every write also increments the hourly ``ClickRollup`` buckets, so trending
+can sum buckets instead of counting raw clicks. Raw clicks older than the
+trending windows can then be pruned with ``manage.py rollup_clicks --prune``.
+"""
+
+import atexit
+import datetime
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import ClickRollup, PersonClick
+
+logger = logging.getLogger(__name__)
+
+
+def _mode():
+    return getattr(settings, "CLICK_RECORDING_MODE", "sync")
+
+
+def hour_bucket(value):
+    """Return the start of the UTC hour containing ``value``."""
+    return value.astimezone(datetime.timezone.utc).replace(
+        minute=0, second=0, microsecond=0
+    )
+
+
+def _increment_rollups(clicks):
+    """Add ``clicks`` (person_id, viewed_at pairs) to their hourly buckets."""
+    counts = Counter(
+        (person_id, hour_bucket(viewed_at)) for person_id, viewed_at in clicks
+    )
+    for (person_id, bucket), count in counts.items():
+        rollups = ClickRollup.objects.filter(person_id=person_id, bucket=bucket)
+        if rollups.update(count=F("count") + count):
+            continue
+        try:
+            with transaction.atomic():
+                ClickRollup.objects.create(
+                    person_id=person_id, bucket=bucket, count=count
+                )
+        except IntegrityError:
+            # Another worker created the bucket in the meantime.
+            rollups.update(count=F("count") + count)
+
+
+def save_clicks(clicks, batch_size=None):
+    """Insert ``clicks`` and update their rollup buckets in one transaction."""
+    with transaction.atomic():
+        PersonClick.objects.bulk_create(
+            [
+                PersonClick(person_id=person_id, viewed_at=viewed_at)
+                for person_id, viewed_at in clicks
+            ],
+            batch_size=batch_size,
+        )
+        _increment_rollups(clicks)
+
+
+class ClickBuffer:
+    """클릭 기록을 모아서 한 번에 저장하는 버퍼"""
+
+    def __init__(self, max_size=None, flush_interval=None):
+        self._max_size = max_size
+        self._flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._clicks = []
+        self._oldest = None
+        self._timer = None
+
+    @property
+    def max_size(self):
+        if self._max_size is not None:
+            return self._max_size
+        return getattr(settings, "CLICK_BUFFER_SIZE", 500)
+
+    @property
+    def flush_interval(self):
+        if self._flush_interval is not None:
+            return self._flush_interval
+        return getattr(settings, "CLICK_FLUSH_INTERVAL", 10)
+
+    def __len__(self):
+        return len(self._clicks)
+
+    def add(self, person_id, viewed_at=None):
+        """Queue a click, flushing if the size or age threshold is reached."""
+        now = time.monotonic()
+        with self._lock:
+            self._clicks.append((person_id, viewed_at or timezone.now()))
+            if self._oldest is None:
+                self._oldest = now
+                self._schedule_flush()
+            should_flush = (
+                len(self._clicks) >= self.max_size
+                or now - self._oldest >= self.flush_interval
+            )
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered clicks in a single ``bulk_create``."""
+        with self._lock:
+            clicks, self._clicks = self._clicks, []
+            self._oldest = None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not clicks:
+            return 0
+        try:
+            save_clicks(clicks, batch_size=self.max_size)
+        except Exception:
+            logger.exception("Failed to flush %d buffered clicks", len(clicks))
+            return 0
+        return len(clicks)
+
+    def reset(self):
+        """Drop buffered clicks without writing them (used after fork)."""
+        self._lock = threading.Lock()
+        self._clicks = []
+        self._oldest = None
+        self._timer = None
+
+    def _schedule_flush(self):
+        # Make sure a quiet worker still flushes within the interval.
+        self._timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_from_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            connections.close_all()
+
+
+click_buffer = ClickBuffer()
+
+atexit.register(click_buffer.flush)
+if hasattr(os, "register_at_fork"):
+    # Buffered clicks belong to the process that recorded them.
+    os.register_at_fork(after_in_child=click_buffer.reset)
+
+
+def record_click(person):
+    """Record a view of ``person`` according to ``CLICK_RECORDING_MODE``."""
+    if _mode() == "buffered":
+        click_buffer.add(person.pk)
+    else:
+        save_clicks([(person.pk, timezone.now())])
+
+
+def rebuild_rollups():
+    """
+    Recompute rollup buckets from the raw clicks still stored.
+
+    Buckets older than the oldest raw click are left untouched, so this is
+    safe to run after raw clicks have been pruned.
+    """
+    oldest = PersonClick.objects.order_by("viewed_at").first()
+    if oldest is None:
+        return 0
+    since = hour_bucket(oldest.viewed_at)
+    buckets = (
+        PersonClick.objects.filter(viewed_at__gte=since)
+        .annotate(bucket=TruncHour("viewed_at", tzinfo=datetime.timezone.utc))
+        .values("person", "bucket")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    with transaction.atomic():
+        ClickRollup.objects.filter(bucket__gte=since).delete()
+        rollups = ClickRollup.objects.bulk_create(
+            (
+                ClickRollup(
+                    person_id=row["person"], bucket=row["bucket"], count=row["count"]
+                )
+                for row in buckets.iterator()
+            ),
+            batch_size=1000,
+        )
+    return len(rollups)
+
+
+def prune_clicks(older_than):
+    """Delete raw clicks viewed before the hour containing ``older_than``."""
+    deleted, _ = PersonClick.objects.filter(
+        viewed_at__lt=hour_bucket(older_than)
+    ).delete()
+    return deleted
@@ -0,0 +1,75 @@
+"""
+Fragment cache for rendered timeline event lists.
+
+``_event_list.html`` is cached per (person, year, language, data version). The
+data version is ``Person.events_updated_at``, which only LifeEvent and Evidence
+writes move forward, in the same transaction, so fragments rendered from older
+data are never looked up again and simply expire after
+``EVENT_FRAGMENT_CACHE_TTL`` seconds. Keeping the version in the database
+rather than the cache means writes from other processes (imports, other
+workers) invalidate the fragments even when the cache is per process.
+
+The receivers in ``signals`` cover writes through ``save()`` and ``delete()``.
+Bulk writes (``bulk_create``, ``bulk_update``, queryset ``update()``) send no
+signals and have to call ``Person.objects.touch(events=True)`` themselves, as
+``load_result_data`` does.
+"""
+
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils import translation
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _ttl():
+    return getattr(settings, "EVENT_FRAGMENT_CACHE_TTL", 86400)
+
+
+def _fragment_key(person_id, year, language, version):
+    return f"bio:events:{person_id}:{year}:{language}:{version}"
+
+
+def get_version(person):
+    """Return the current data version of ``person``'s events."""
+    return int(person.events_updated_at.timestamp() * 1_000_000)
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def fragment_stats():
+    """Return this process's fragment cache ``{"hits": n, "misses": n}``."""
+    with _stats_lock:
+        return {"hits": _stats["hits"], "misses": _stats["misses"]}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def render_event_list(request, person, year, life_events):
+    """
+    Return the rendered ``_event_list.html`` for ``person`` and ``year``.
+
+    ``life_events`` should be a lazy queryset; it is only evaluated on a miss.
+    """
+    key = _fragment_key(
+        person.pk, year, translation.get_language(), get_version(person)
+    )
+    html = cache.get(key)
+    if html is not None:
+        _count("hits")
+        return html
+    _count("misses")
+    html = render_to_string("_event_list.html", {"life_events": life_events}, request)
+    cache.set(key, html, timeout=_ttl())
+    return html
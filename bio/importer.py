@@ -0,0 +1,258 @@
+"""
+Parsing and validation of person documents for ``load_result_data``.
+
+Nothing here touches the database, so files can be parsed in worker
+processes while a single process writes the results.
+"""
+
+import glob
+import hashlib
+import json
+import os
+from datetime import date
+from typing import NamedTuple
+
+JSONL_EXTENSIONS = (".jsonl", ".ndjson")
+DATA_EXTENSIONS = (".json", *JSONL_EXTENSIONS)
+
+
+def iter_json_array(f, chunk_size=64 * 1024):
+    """Yield the elements of a top-level JSON array without reading it all."""
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+
+    def read_more():
+        nonlocal buffer, pos, eof
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+    def next_char():
+        # Skip whitespace and return the next character ("" at end of input)
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if eof:
+                return ""
+            read_more()
+
+    if next_char() != "[":
+        raise json.JSONDecodeError("Expected a JSON array", buffer, pos)
+    pos += 1
+    if next_char() == "]":
+        return
+
+    while True:
+        next_char()
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            read_more()
+            continue
+        yield value
+
+        buffer, pos = buffer[end:], 0
+        char = next_char()
+        if char == "]":
+            return
+        if char != ",":
+            raise json.JSONDecodeError("Expected ',' or ']'", buffer, pos)
+        pos += 1
+
+
+def iter_json_lines(f):
+    """Yield one JSON document per non-empty line."""
+    for line_number, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise json.JSONDecodeError(
+                f"Line {line_number}: {e.msg}", e.doc, e.pos
+            ) from None
+
+
+def detect_format(f, file_path):
+    """Guess the input format from the extension and the first character."""
+    if file_path.lower().endswith(JSONL_EXTENSIONS):
+        return "jsonl"
+    first = ""
+    while True:
+        first = f.read(1)
+        if not first or not first.isspace():
+            break
+    f.seek(0)
+    return "array" if first == "[" else "object"
+
+
+def iter_records(f, file_format):
+    """Yield person documents from an open file in the given format."""
+    if file_format == "jsonl":
+        yield from iter_json_lines(f)
+    elif file_format == "array":
+        yield from iter_json_array(f)
+    else:
+        yield json.load(f)
+
+
+class PersonRecord(NamedTuple):
+    name: str
+    fields: dict
+    events: list
+    skipped: list
+    content_hash: str
+
+
+# max_length of the Person and LifeEvent fields, checked here so one bad
+# record cannot fail the bulk write of its whole batch.
+NAME_LENGTH = 100
+OCCUPATION_LENGTH = 500
+NATIONALITY_LENGTH = 100
+TITLE_LENGTH = 200
+
+
+def _text(data, key, max_length=None, default=None):
+    """Return the string ``data[key]``, ``default`` if missing or null."""
+    value = data.get(key)
+    if value is None:
+        return default
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid {key}: expected a string")
+    if max_length and len(value) > max_length:
+        raise ValueError(f"Invalid {key}: longer than {max_length} characters")
+    return value
+
+
+def _date(data, key):
+    """Return ``data[key]`` as an ISO date string, ``None`` if missing or null."""
+    value = data.get(key)
+    if value in (None, ""):
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {key}: {value!r} is not an ISO date") from None
+
+
+def parse_record(data):
+    """
+    Validate one person document.
+
+    Returns a ``PersonRecord``; raises ``ValueError`` when the document has no
+    name or a person field has the wrong type, length or date format. Life
+    events missing a title, description or valid ISO date are listed in
+    ``skipped``. ``content_hash`` identifies the document's content so
+    unchanged re-imports can be skipped.
+    """
+    if not isinstance(data, dict) or not data.get("name"):
+        raise ValueError("No name found in the data")
+    name = _text(data, "name", NAME_LENGTH)
+
+    # Process occupation list to comma-separated string
+    occupation_list = data.get("occupation") or []
+    if isinstance(occupation_list, str):
+        occupation_list = [occupation_list]
+    if not isinstance(occupation_list, list) or not all(
+        isinstance(occupation, str) for occupation in occupation_list
+    ):
+        raise ValueError("Invalid occupation: expected a list of strings")
+    if len(",".join(occupation_list)) > OCCUPATION_LENGTH:
+        raise ValueError(
+            f"Invalid occupation: longer than {OCCUPATION_LENGTH} characters"
+        )
+    fields = {
+        "biography": _text(data, "biography", default=""),
+        "birth_date": _date(data, "birth_date"),
+        "death_date": _date(data, "death_date"),
+        "occupation": ",".join(occupation_list) or None,
+        "nationality": _text(data, "nationality", NATIONALITY_LENGTH),
+    }
+
+    events, skipped = [], []
+    life_events = data.get("life_events") or []
+    if not isinstance(life_events, list):
+        raise ValueError("Invalid life_events: expected a list")
+    for event_data in life_events:
+        if not isinstance(event_data, dict):
+            skipped.append(None)
+            continue
+        title = event_data.get("title")
+        description = event_data.get("description")
+        event_date = event_data.get("event_date")
+        try:
+            event_date = date.fromisoformat(event_date).isoformat()
+        except (TypeError, ValueError):
+            event_date = None
+        valid_text = (
+            isinstance(title, str)
+            and isinstance(description, str)
+            and len(title) <= TITLE_LENGTH
+        )
+        if not (valid_text and title and description and event_date):
+            skipped.append(title)
+            continue
+        events.append(
+            {"title": title, "description": description, "event_date": event_date}
+        )
+
+    content = json.dumps([name, fields, events], sort_keys=True, ensure_ascii=False)
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return PersonRecord(name, fields, events, skipped, content_hash)
+
+
+def event_key(event_date, title):
+    """Stable identity of a life event within one person."""
+    if not isinstance(event_date, str):
+        event_date = event_date.isoformat()
+    return event_date, title
+
+
+def parse_file(path, file_format="auto"):
+    """
+    Parse and validate every person document in ``path``.
+
+    Returns ``(records, errors, failure)``: the parsed records, messages for
+    invalid records, and a message if the file could not be read to the end.
+    Records parsed before a JSON error are still returned, as ``--jobs=1``
+    streaming has already written them by then.
+    """
+    records, errors = [], []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if file_format == "auto":
+                file_format = detect_format(f, path)
+            for index, data in enumerate(iter_records(f, file_format), 1):
+                try:
+                    records.append(parse_record(data))
+                except ValueError as e:
+                    errors.append(f"Record {index}: {e}")
+    except FileNotFoundError:
+        return [], errors, f"File {path} not found"
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        return records, errors, f"Invalid JSON in {path}: {e}"
+    return records, errors, None
+
+
+def expand_paths(patterns):
+    """Expand directories and glob patterns into a sorted list of data files."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                paths.extend(
+                    os.path.join(root, name)
+                    for name in files
+                    if name.lower().endswith(DATA_EXTENSIONS)
+                )
+        elif any(char in pattern for char in "*?["):
+            paths.extend(glob.glob(pattern, recursive=True))
+        else:
+            paths.append(pattern)
+    return sorted(dict.fromkeys(paths))
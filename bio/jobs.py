@@ -0,0 +1,80 @@
+"""
+Database-backed queue for uploaded import files.
+
+``upload_file`` only stores the upload and enqueues an ``ImportJob``; the
+``run_import_jobs`` management command claims pending jobs one at a time and
+runs ``load_result_data`` on them.
+
+A job still ``running`` ``IMPORT_JOB_TIMEOUT`` seconds after it was claimed is
+assumed to belong to a worker that died, and is claimed again. Imports run with
+``--update``, so loading a file a second time is safe.
+"""
+
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ImportJob
+
+# Keep the end of the command output on the job for the status page.
+MESSAGE_LIMIT = 4000
+
+
+def enqueue_import(uploaded_file):
+    """Store ``uploaded_file`` and queue it for import."""
+    return ImportJob.objects.create(
+        file=uploaded_file, original_name=uploaded_file.name
+    )
+
+
+def _claimable():
+    """Pending jobs, and running jobs whose worker appears to have died."""
+    timeout = getattr(settings, "IMPORT_JOB_TIMEOUT", 3600)
+    stale = timezone.now() - timedelta(seconds=timeout)
+    return Q(status="pending") | Q(status="running", started_at__lt=stale)
+
+
+def claim_next_job():
+    """Mark the oldest claimable job as running and return it, or ``None``."""
+    while True:
+        with transaction.atomic():
+            job = (
+                ImportJob.objects.filter(_claimable())
+                .order_by("created_at", "pk")
+                .first()
+            )
+            if job is None:
+                return None
+            # Another worker may have claimed it since the SELECT
+            claimed = (
+                ImportJob.objects.filter(_claimable(), pk=job.pk)
+                .filter(status=job.status, started_at=job.started_at)
+                .update(status="running", started_at=timezone.now())
+            )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def run_job(job):
+    """Run ``load_result_data`` on a claimed job and record the outcome."""
+    output = StringIO()
+    try:
+        call_command(
+            "load_result_data", f"--file={job.file.path}", "--update", stdout=output
+        )
+    except Exception as e:
+        job.status = "failed"
+        output.write(f"\n{e}")
+    else:
+        job.status = "done"
+    job.message = output.getvalue().strip()[-MESSAGE_LIMIT:]
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "message", "finished_at"])
+    job.file.delete(save=False)
+    return job
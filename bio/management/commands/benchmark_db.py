@@ -0,0 +1,178 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from statistics import quantiles
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections
+from django.utils import timezone
+from bio.clicks import save_clicks
+from bio.models import LifeEvent, Person
+from comment.models import Comment
+
+
+def _percentile(values, n):
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return quantiles(values, n=100)[n - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure concurrent bio page reads and click writes against the "
+        "database of the current VIO_DB_PROFILE, or compare several profiles"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threads", type=int, default=8, help="Concurrent workers (default: 8)"
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=10,
+            help="Seconds to run (default: 10)",
+        )
+        parser.add_argument(
+            "--write-ratio",
+            type=float,
+            default=0.5,
+            help="Share of operations that record a click (default: 0.5)",
+        )
+        parser.add_argument(
+            "--compare",
+            help=(
+                "Comma-separated VIO_DB_PROFILE values to run one after another "
+                "in subprocesses, e.g. sqlite-basic,sqlite,postgres"
+            ),
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Print the result as one JSON line"
+        )
+
+    def handle(self, *args, **options):
+        if options["compare"]:
+            self.compare(options["compare"].split(","), options)
+            return
+
+        result = self.run_benchmark(
+            max(options["threads"], 1), options["duration"], options["write_ratio"]
+        )
+        if options["json"]:
+            self.stdout.write(json.dumps(result))
+        else:
+            self.write_table([result])
+
+    def run_benchmark(self, threads, duration, write_ratio):
+        """Run ``threads`` workers for ``duration`` seconds and return stats."""
+        person = Person.objects.create(name=f"benchmark {time.time_ns()}")
+        LifeEvent.objects.bulk_create(
+            LifeEvent(
+                person=person,
+                title=f"event {i}",
+                description="benchmark",
+                event_date=f"{2000 + i % 5}-01-{i % 28 + 1:02d}",
+            )
+            for i in range(20)
+        )
+
+        reads, writes, errors = [], [], []
+        lock = threading.Lock()
+        start = threading.Barrier(threads)
+
+        def read():
+            page = Person.objects.get(slug=person.slug)
+            years = list(page.life_events.dates("event_date", "year"))
+            list(
+                page.life_events.filter(event_date__year=years[0].year)
+                .order_by("event_date")
+                .prefetch_related("evidences")
+            )
+            Comment.objects.for_object(page).thread_page(limit=20)
+
+        def worker():
+            rng = random.Random()
+            timings = {"read": [], "write": []}
+            failed = 0
+            start.wait()
+            deadline = time.monotonic() + duration
+            try:
+                while time.monotonic() < deadline:
+                    kind = "write" if rng.random() < write_ratio else "read"
+                    began = time.perf_counter()
+                    try:
+                        if kind == "write":
+                            save_clicks([(person.pk, timezone.now())])
+                        else:
+                            read()
+                    except DatabaseError:
+                        # e.g. "database is locked" once the busy timeout ran out
+                        failed += 1
+                        continue
+                    timings[kind].append(time.perf_counter() - began)
+            finally:
+                connections.close_all()
+            with lock:
+                reads.extend(timings["read"])
+                writes.extend(timings["write"])
+                errors.append(failed)
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        began = time.monotonic()
+        try:
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+        finally:
+            elapsed = time.monotonic() - began
+            # Removes the benchmark clicks and rollups with it
+            person.delete()
+
+        return {
+            "profile": getattr(settings, "DB_PROFILE", "default"),
+            "threads": threads,
+            "reads_per_s": len(reads) / elapsed,
+            "writes_per_s": len(writes) / elapsed,
+            "read_p95_ms": _percentile(reads, 95) * 1000,
+            "write_p95_ms": _percentile(writes, 95) * 1000,
+            "errors": sum(errors),
+        }
+
+    def compare(self, profiles, options):
+        results = []
+        for profile in profiles:
+            command = [
+                sys.executable,
+                sys.argv[0],
+                "benchmark_db",
+                "--json",
+                f"--threads={options['threads']}",
+                f"--duration={options['duration']}",
+                f"--write-ratio={options['write_ratio']}",
+            ]
+            env = {**os.environ, "VIO_DB_PROFILE": profile}
+            self.stdout.write(f"Running {profile}...")
+            process = subprocess.run(command, env=env, capture_output=True, text=True)
+            if process.returncode:
+                raise CommandError(f"{profile} failed:\n{process.stderr}")
+            results.append(json.loads(process.stdout.strip().splitlines()[-1]))
+        self.write_table(results)
+
+    def write_table(self, results):
+        self.stdout.write(
+            f"{'profile':<14}{'threads':>8}{'reads/s':>10}{'writes/s':>10}"
+            f"{'read p95':>11}{'write p95':>11}{'errors':>8}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['profile']:<14}{row['threads']:>8}"
+                f"{row['reads_per_s']:>10.0f}{row['writes_per_s']:>10.0f}"
+                f"{row['read_p95_ms']:>9.1f}ms{row['write_p95_ms']:>9.1f}ms"
+                f"{row['errors']:>8}"
+            )
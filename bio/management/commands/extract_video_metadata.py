@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from bio.models import Evidence
+
+
+class Command(BaseCommand):
+    help = "Extract duration, dimensions and poster frames of evidence videos"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Process every video, not only those without metadata",
+        )
+
+    def handle(self, *args, **options):
+        evidences = Evidence.objects.exclude(video_file="").exclude(video_file=None)
+        if not options["all"]:
+            evidences = evidences.filter(video_duration=None)
+
+        count = 0
+        for evidence in evidences.iterator():
+            evidence.update_video_metadata()
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Processed {count} videos"))
@@ -1,7 +1,22 @@
 import json
-from django.core.management.base import BaseCommand
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
-from bio.models import Person, LifeEvent
+from bio.passages import index_people
+from bio.signals import bulk_import
+from bio.importer import (
+    detect_format,
+    event_key,
+    expand_paths,
+    iter_records,
+    parse_file,
+    parse_record,
+)
+from bio.models import Person, LifeEvent, allocate_slugs
+
+PERSON_FIELDS = ["biography", "birth_date", "death_date", "occupation", "nationality"]
 
 
 class Command(BaseCommand):
@@ -19,107 +34,292 @@ class Command(BaseCommand):
             action="store_true",
             help="Update existing person data instead of creating new",
         )
+        parser.add_argument(
+            "--format",
+            choices=["auto", "object", "array", "jsonl"],
+            default="auto",
+            help=(
+                "Input format: a single person object, a JSON array of persons, "
+                "or JSON Lines with one person per line (default: auto-detect)"
+            ),
+        )
+        parser.add_argument(
+            "--path",
+            action="append",
+            help=(
+                "Directory or glob pattern of data files to load; may be given "
+                "more than once and takes precedence over --file"
+            ),
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=1,
+            help=(
+                "Number of worker processes parsing files in parallel "
+                "(default: 1, which streams each file instead)"
+            ),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of persons written per transaction (default: 500)",
+        )
 
     def handle(self, *args, **options):
-        file_path = options["file"]
-        update_existing = options["update"]
+        self.update_existing = options["update"]
+        self.batch_size = max(options["batch_size"], 1)
+        self.batch = []
+        self.totals = dict.fromkeys(
+            [
+                "created",
+                "updated",
+                "unchanged",
+                "existing",
+                "failed",
+                "events_created",
+                "events_updated",
+                "events_deleted",
+            ],
+            0,
+        )
+        self.files = {"processed": 0, "partial": 0, "skipped": 0, "failed": 0}
+        self.started = time.monotonic()
+
+        paths = expand_paths(options["path"]) if options["path"] else [options["file"]]
+        if not paths:
+            self.stdout.write(self.style.ERROR("No data files found"))
+            return
 
+        jobs = max(options["jobs"], 1)
+        if jobs > 1 and len(paths) > 1:
+            # Parse in worker processes; only this process writes (SQLite
+            # allows a single writer at a time)
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                results = executor.map(
+                    parse_file,
+                    paths,
+                    repeat(options["format"]),
+                    chunksize=max(len(paths) // (jobs * 4), 1),
+                )
+                for path, (records, errors, failure) in zip(paths, results):
+                    self.load_parsed(path, records, errors, failure)
+        else:
+            for path in paths:
+                self.load_streaming(path, options["format"])
+
+        if self.batch:
+            self.write_batch(self.batch)
+            self.batch = []
+        self.report_progress()
+        self.stdout.write(
+            f"Files: {self.files['processed']} processed, "
+            f"{self.files['partial']} partially loaded, "
+            f"{self.files['skipped']} skipped, {self.files['failed']} failed"
+        )
+        if self.files["failed"] or self.files["partial"]:
+            # Fail the command, so callers such as the import worker see it
+            raise CommandError(
+                f"Data loading completed with errors: "
+                f"{self.files['failed']} file(s) could not be loaded, "
+                f"{self.files['partial']} only partially"
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS("Data loading completed successfully!")
+            )
+
+    def load_streaming(self, path, file_format):
+        """Read one file record by record, writing full batches as they fill."""
+        loaded = 0
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            with open(path, "r", encoding="utf-8") as f:
+                if file_format == "auto":
+                    file_format = detect_format(f, path)
+                for index, data in enumerate(iter_records(f, file_format), 1):
+                    try:
+                        record = parse_record(data)
+                    except ValueError as e:
+                        self.record_failed(path, f"Record {index}: {e}")
+                        continue
+                    self.add_record(record)
+                    loaded += 1
         except FileNotFoundError:
-            self.stdout.write(self.style.ERROR(f"File {file_path} not found"))
+            self.file_failed(f"File {path} not found")
             return
-        except json.JSONDecodeError as e:
-            self.stdout.write(self.style.ERROR(f"Invalid JSON in {file_path}: {e}"))
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            # Records read before the error are queued or already written
+            self.file_broken(path, loaded, f"Invalid JSON in {path}: {e}")
             return
+        self.file_loaded(path, loaded)
 
-        with transaction.atomic():
-            # Process Person data
-            person_name = data.get("name")
-            if not person_name:
-                self.stdout.write(self.style.ERROR("No name found in the data"))
-                return
-
-            # Process occupation list to comma-separated string
-            occupation_list = data.get("occupation", [])
-            occupation_str = ",".join(occupation_list) if occupation_list else None
-
-            # Get or create Person
-            if update_existing:
-                person, created = Person.objects.update_or_create(
-                    name=person_name,
-                    defaults={
-                        "biography": data.get("biography", ""),
-                        "birth_date": data.get("birth_date"),
-                        "death_date": data.get("death_date"),
-                        "occupation": occupation_str,
-                        "nationality": data.get("nationality"),
-                    },
-                )
-            else:
-                person, created = Person.objects.get_or_create(
-                    name=person_name,
-                    defaults={
-                        "biography": data.get("biography", ""),
-                        "birth_date": data.get("birth_date"),
-                        "death_date": data.get("death_date"),
-                        "occupation": occupation_str,
-                        "nationality": data.get("nationality"),
-                    },
-                )
+    def load_parsed(self, path, records, errors, failure):
+        """Queue the records a worker process parsed from one file."""
+        for error in errors:
+            self.record_failed(path, error)
+        # Like streaming, keep the records read before a JSON error
+        for record in records:
+            self.add_record(record)
+        if failure:
+            self.file_broken(path, len(records), failure)
+            return
+        self.file_loaded(path, len(records))
 
-            if created:
+    def add_record(self, record):
+        self.batch.append(record)
+        if len(self.batch) >= self.batch_size:
+            self.write_batch(self.batch)
+            self.batch = []
+            self.report_progress()
+
+    def record_failed(self, path, message):
+        self.totals["failed"] += 1
+        self.stdout.write(self.style.ERROR(f"{path}: {message}"))
+
+    def file_failed(self, message):
+        self.files["failed"] += 1
+        self.stdout.write(self.style.ERROR(message))
+
+    def file_broken(self, path, loaded, message):
+        """Report a file that stopped parsing after ``loaded`` records."""
+        if not loaded:
+            self.file_failed(message)
+            return
+        self.files["partial"] += 1
+        self.stdout.write(
+            self.style.ERROR(f"{message} (partially loaded: {loaded} records)")
+        )
+
+    def file_loaded(self, path, loaded):
+        if loaded:
+            self.files["processed"] += 1
+        else:
+            self.files["skipped"] += 1
+            self.stdout.write(self.style.WARNING(f"No person data in {path}"))
+
+    def write_batch(self, records):
+        """Create or update a batch of parsed records in one transaction."""
+        # The last document wins when a name appears twice in the batch
+        records = {record.name: record for record in records}
+        for record in records.values():
+            for title in record.skipped:
                 self.stdout.write(
-                    self.style.SUCCESS(f"Created new person: {person_name}")
+                    self.style.WARNING(f"Skipping incomplete event: {title}")
                 )
+
+        # People are touched and re-indexed once below, not per deleted row
+        with bulk_import(), transaction.atomic():
+            existing = {}
+            for person in Person.objects.filter(name__in=records).order_by("pk"):
+                existing.setdefault(person.name, person)
+
+            new_people = [
+                Person(name=name, import_hash=record.content_hash, **record.fields)
+                for name, record in records.items()
+                if name not in existing
+            ]
+            allocate_slugs(new_people)
+            Person.objects.bulk_create(new_people)
+            events = [
+                LifeEvent(person=person, **event)
+                for person in new_people
+                for event in records[person.name].events
+            ]
+
+            if self.update_existing:
+                changed = [
+                    person
+                    for name, person in existing.items()
+                    if person.import_hash != records[name].content_hash
+                ]
+                self.totals["unchanged"] += len(existing) - len(changed)
+                self.totals["updated"] += len(changed)
+                for person in changed:
+                    record = records[person.name]
+                    for field, value in record.fields.items():
+                        setattr(person, field, value)
+                    person.import_hash = record.content_hash
+                Person.objects.bulk_update(changed, [*PERSON_FIELDS, "import_hash"])
+                events += self.sync_events(changed, records)
+                touched = changed
             else:
-                self.stdout.write(
-                    self.style.SUCCESS(f"Updated existing person: {person_name}")
-                )
+                # Without --update existing persons are kept and get the events
+                self.totals["existing"] += len(existing)
+                touched = list(existing.values())
+                events += [
+                    LifeEvent(person=person, **event)
+                    for name, person in existing.items()
+                    for event in records[name].events
+                ]
 
-            # Delete existing life events if updating
-            if update_existing:
-                LifeEvent.objects.filter(person=person).delete()
-                self.stdout.write(
-                    self.style.WARNING(
-                        f"Deleted existing life events for {person_name}"
-                    )
+            LifeEvent.objects.bulk_create(events)
+            # Bulk writes send no signals, so mark the people updated here,
+            # which also invalidates their cached event lists
+            if touched:
+                Person.objects.filter(pk__in=[person.pk for person in touched]).touch(
+                    events=True
                 )
+            # Re-chunk only the people this batch created or changed
+            index_people(person.pk for person in [*new_people, *touched])
 
-            # Process Life Events
-            life_events = data.get("life_events", [])
-            events_created = 0
-
-            for event_data in life_events:
-                title = event_data.get("title")
-                description = event_data.get("description")
-                event_date = event_data.get("event_date")
-
-                if not all([title, description, event_date]):
-                    self.stdout.write(
-                        self.style.WARNING(f"Skipping incomplete event: {title}")
-                    )
-                    continue
-
-                try:
-                    LifeEvent.objects.create(
-                        person=person,
-                        title=title,
-                        description=description,
-                        event_date=event_date,
-                    )
-                    events_created += 1
-                except Exception as e:
-                    self.stdout.write(
-                        self.style.ERROR(f'Error creating event "{title}": {e}')
-                    )
+        self.totals["created"] += len(new_people)
+        self.totals["events_created"] += len(events)
 
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f"Successfully loaded data for {person_name}: "
-                    f"{events_created} life events created"
-                )
-            )
+    def sync_events(self, people, records):
+        """
+        Update and delete the life events of ``people`` to match ``records``.
+
+        Events are matched on (date, title); matched events are updated in
+        place so their evidences are kept. Returns the unsaved new events.
+        """
+        current = {}
+        duplicates = []
+        for event in LifeEvent.objects.filter(person__in=people).order_by("pk"):
+            key = (event.person_id, *event_key(event.event_date, event.title))
+            if key in current:
+                duplicates.append(event.pk)
+            else:
+                current[key] = event
 
-        self.stdout.write(self.style.SUCCESS("Data loading completed successfully!"))
+        new_events, changed = [], []
+        for person in people:
+            for event in records[person.name].events:
+                key = (person.pk, *event_key(event["event_date"], event["title"]))
+                existing = current.pop(key, None)
+                if existing is None:
+                    new_events.append(LifeEvent(person=person, **event))
+                elif existing.description != event["description"]:
+                    existing.description = event["description"]
+                    changed.append(existing)
+
+        LifeEvent.objects.bulk_update(changed, ["description"])
+        removed = [event.pk for event in current.values()] + duplicates
+        LifeEvent.objects.filter(pk__in=removed).delete()
+        self.totals["events_updated"] += len(changed)
+        self.totals["events_deleted"] += len(removed)
+        return new_events
+
+    def report_progress(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        totals = self.totals
+        persons = (
+            totals["created"]
+            + totals["updated"]
+            + totals["unchanged"]
+            + totals["existing"]
+        )
+        if self.update_existing:
+            existing = f"{totals['updated']} updated, {totals['unchanged']} unchanged"
+        else:
+            existing = f"{totals['existing']} existing"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{persons} persons ({totals['created']} created, {existing}, "
+                f"{totals['failed']} failed), life events: "
+                f"{totals['events_created']} created, "
+                f"{totals['events_updated']} updated, "
+                f"{totals['events_deleted']} deleted in {elapsed:.1f}s "
+                f"({persons / elapsed:.0f} persons/s)"
+            )
+        )
@@ -0,0 +1,131 @@
+import threading
+import time
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from statistics import quantiles
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _percentile(values, n):
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return quantiles(values, n=100)[n - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test running servers, e.g. the WSGI and the ASGI deployment, "
+        "with concurrent keep-alive clients and compare their throughput"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target",
+            action="append",
+            required=True,
+            help="NAME=URL of a running server; may be given more than once",
+        )
+        parser.add_argument(
+            "--path",
+            action="append",
+            help="Path to request, cycled through by every client (default: /en/)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=32,
+            help="Concurrent clients per target (default: 32)",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=10,
+            help="Seconds to run each target (default: 10)",
+        )
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options["target"]:
+            name, sep, url = target.partition("=")
+            if not sep or not urlsplit(url).hostname:
+                raise CommandError(f"Expected NAME=URL, got {target!r}")
+            targets.append((name, url))
+        paths = options["path"] or ["/en/"]
+
+        results = [
+            self.run_target(
+                name,
+                url,
+                paths,
+                max(options["concurrency"], 1),
+                options["duration"],
+            )
+            for name, url in targets
+        ]
+        self.stdout.write(
+            f"{'target':<12}{'requests':>10}{'req/s':>10}"
+            f"{'p50':>10}{'p95':>10}{'p99':>10}{'errors':>8}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['name']:<12}{row['requests']:>10}{row['rps']:>10.0f}"
+                f"{row['p50'] * 1000:>8.1f}ms{row['p95'] * 1000:>8.1f}ms"
+                f"{row['p99'] * 1000:>8.1f}ms{row['errors']:>8}"
+            )
+
+    def run_target(self, name, url, paths, concurrency, duration):
+        base = urlsplit(url)
+        connection_class = HTTPSConnection if base.scheme == "https" else HTTPConnection
+        prefix = base.path.rstrip("/")
+        latencies, errors = [], []
+        lock = threading.Lock()
+        start = threading.Barrier(concurrency)
+
+        def client(offset):
+            timings, failed = [], 0
+            connection = connection_class(base.hostname, base.port, timeout=30)
+            start.wait()
+            deadline = time.monotonic() + duration
+            i = offset
+            while time.monotonic() < deadline:
+                path = prefix + paths[i % len(paths)]
+                i += 1
+                began = time.perf_counter()
+                try:
+                    connection.request("GET", path)
+                    response = connection.getresponse()
+                    response.read()
+                except (OSError, HTTPException):
+                    failed += 1
+                    connection.close()
+                    continue
+                if response.status >= 400:
+                    failed += 1
+                    continue
+                timings.append(time.perf_counter() - began)
+            connection.close()
+            with lock:
+                latencies.extend(timings)
+                errors.append(failed)
+
+        self.stdout.write(f"Loading {name} ({url})...")
+        clients = [
+            threading.Thread(target=client, args=(i,)) for i in range(concurrency)
+        ]
+        began = time.monotonic()
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        elapsed = time.monotonic() - began
+
+        return {
+            "name": name,
+            "requests": len(latencies),
+            "rps": len(latencies) / elapsed,
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "p99": _percentile(latencies, 99),
+            "errors": sum(errors),
+        }
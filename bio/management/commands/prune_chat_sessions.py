@@ -0,0 +1,31 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from bio.models import ChatSession
+
+
+class Command(BaseCommand):
+    help = "Delete chat sessions, with their turns, idle for longer than their TTL"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=getattr(settings, "CHAT_SESSION_TTL_DAYS", 30),
+            help="Delete sessions idle for more than DAYS days "
+            "(default: CHAT_SESSION_TTL_DAYS)",
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] < 0:
+            raise CommandError("--days must be a positive number of days")
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        sessions = ChatSession.objects.filter(updated_at__lt=cutoff)
+        count = sessions.count()
+        sessions.delete()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Pruned {count} chat sessions idle since {cutoff:%Y-%m-%d}"
+            )
+        )
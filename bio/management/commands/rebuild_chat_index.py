@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from bio import passages
+from bio.models import Person
+
+
+class Command(BaseCommand):
+    help = "Rebuild the chat passages and their search index for every person"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Number of people indexed per query batch (default: 200)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(options["batch_size"], 1)
+        pks = list(Person.objects.order_by("pk").values_list("pk", flat=True))
+        count = 0
+        for start in range(0, len(pks), batch_size):
+            count += passages.index_people(pks[start : start + batch_size])
+        passages.rebuild_index()
+        self.stdout.write(
+            self.style.SUCCESS(f"Indexed {count} passages for {len(pks)} people")
+        )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from bio import search
+from bio.models import Person
+
+
+class Command(BaseCommand):
+    help = "Rebuild the Person full-text search index from scratch"
+
+    def handle(self, *args, **options):
+        if not search.fts_available():
+            self.stdout.write(
+                self.style.WARNING(
+                    "Full-text search needs SQLite; explore uses icontains instead"
+                )
+            )
+            return
+
+        search.rebuild_index()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt search index for {Person.objects.count()} people"
+            )
+        )
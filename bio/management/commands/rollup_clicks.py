@@ -0,0 +1,40 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from bio.clicks import prune_clicks, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild hourly click rollups and prune raw PersonClick rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Recompute rollup buckets from the raw clicks still stored",
+        )
+        parser.add_argument(
+            "--prune",
+            type=int,
+            metavar="DAYS",
+            help="Delete raw clicks older than DAYS days (rollups are kept)",
+        )
+
+    def handle(self, *args, **options):
+        if not options["rebuild"] and options["prune"] is None:
+            raise CommandError("Nothing to do: pass --rebuild and/or --prune DAYS")
+
+        if options["rebuild"]:
+            buckets = rebuild_rollups()
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {buckets} rollup buckets"))
+
+        if options["prune"] is not None:
+            if options["prune"] < 0:
+                raise CommandError("--prune must be a positive number of days")
+            cutoff = timezone.now() - timedelta(days=options["prune"])
+            deleted = prune_clicks(cutoff)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Pruned {deleted} clicks older than {cutoff:%Y-%m-%d %H:00}"
+                )
+            )
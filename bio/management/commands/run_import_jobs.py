@@ -0,0 +1,34 @@
+import time
+from django.core.management.base import BaseCommand
+from bio.jobs import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    help = "Process uploaded files queued by the upload page"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process the jobs currently pending and exit",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait between checks for new jobs (default: 2)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+                continue
+
+            self.stdout.write(f"Importing {job.original_name} (job {job.pk})")
+            run_job(job)
+            style = self.style.SUCCESS if job.status == "done" else self.style.ERROR
+            self.stdout.write(style(f"Job {job.pk} {job.get_status_display()}"))
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 17:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bio", "0005_person_chat_enabled"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="personclick",
+            name="viewed_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
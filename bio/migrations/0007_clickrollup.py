@@ -0,0 +1,81 @@
+# Generated by Django 6.0 on 2026-10-18 17:41
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+
+
+def backfill_rollups(apps, schema_editor):
+    PersonClick = apps.get_model("bio", "PersonClick")
+    ClickRollup = apps.get_model("bio", "ClickRollup")
+
+    buckets = (
+        PersonClick.objects.annotate(
+            bucket=TruncHour("viewed_at", tzinfo=datetime.timezone.utc)
+        )
+        .values("person", "bucket")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    ClickRollup.objects.bulk_create(
+        (
+            ClickRollup(
+                person_id=row["person"], bucket=row["bucket"], count=row["count"]
+            )
+            for row in buckets.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bio", "0006_personclick_viewed_at_default"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClickRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "bucket",
+                    models.DateTimeField(help_text="집계 구간의 시작 시각 (UTC, 정시)"),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "person",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="click_rollups",
+                        to="bio.person",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["bucket", "person"],
+                        name="bio_clickro_bucket_521c2b_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("person", "bucket"), name="unique_click_rollup_bucket"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-18 17:43
+
+from django.db import migrations
+
+from bio import search
+
+
+def create_search_index(apps, schema_editor):
+    search.rebuild_index(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    if not search.fts_available(schema_editor.connection):
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sql in search.DROP_SQL:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bio", "0007_clickrollup"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0 on 2026-10-18 17:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bio", "0008_person_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="person",
+            name="import_hash",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text="마지막으로 가져온 데이터의 해시",
+                max_length=64,
+            ),
+        ),
+    ]
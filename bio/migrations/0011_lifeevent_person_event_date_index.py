@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 17:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bio", "0010_importjob"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="lifeevent",
+            name="person",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="life_events",
+                to="bio.person",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="lifeevent",
+            index=models.Index(
+                fields=["person", "event_date"], name="bio_lifeeve_person__680c5f_idx"
+            ),
+        ),
+    ]
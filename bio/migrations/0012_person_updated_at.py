@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-18 17:54
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    Person = apps.get_model("bio", "Person")
+    Person.objects.update(updated_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bio", "0011_lifeevent_person_event_date_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="person",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                db_index=True,
+                help_text="인물 또는 생애 사건, 증빙 자료, 댓글이 마지막으로 바뀐 시각",
+            ),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 6.0 on 2026-10-18 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bio", "0012_person_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="evidence",
+            name="video_duration",
+            field=models.FloatField(
+                blank=True, editable=False, help_text="영상 길이(초)", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="evidence",
+            name="video_height",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="evidence",
+            name="video_poster",
+            field=models.ImageField(
+                blank=True,
+                editable=False,
+                help_text="영상 대표 이미지",
+                null=True,
+                upload_to="evidences/posters/",
+            ),
+        ),
+        migrations.AddField(
+            model_name="evidence",
+            name="video_width",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
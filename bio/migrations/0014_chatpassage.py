@@ -0,0 +1,86 @@
+# Generated by Django 6.0 on 2026-10-18 18:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from bio import passages
+
+
+def create_passage_index(apps, schema_editor):
+    passages.install_index(schema_editor.connection)
+
+
+def drop_passage_index(apps, schema_editor):
+    if not passages.fts_available(schema_editor.connection):
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sql in passages.DROP_SQL:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bio", "0013_evidence_video_metadata"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChatPassage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "source",
+                    models.CharField(
+                        choices=[
+                            ("biography", "약력"),
+                            ("event", "생애 사건"),
+                            ("evidence", "증빙 자료"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("text", models.TextField()),
+                (
+                    "position",
+                    models.PositiveIntegerField(help_text="인물 안에서의 순서"),
+                ),
+                (
+                    "life_event",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="chat_passages",
+                        to="bio.lifeevent",
+                    ),
+                ),
+                (
+                    "person",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="chat_passages",
+                        to="bio.person",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["person", "position"],
+                "indexes": [
+                    models.Index(
+                        fields=["person", "position"],
+                        name="bio_chatpas_person__43aa71_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(create_passage_index, drop_passage_index),
+    ]
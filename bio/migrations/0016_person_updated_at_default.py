@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 18:16
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bio", "0015_chatsession"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="person",
+            name="updated_at",
+            field=models.DateTimeField(
+                db_index=True,
+                default=django.utils.timezone.now,
+                editable=False,
+                help_text="인물 또는 생애 사건, 증빙 자료, 댓글이 마지막으로 바뀐 시각",
+            ),
+        ),
+    ]
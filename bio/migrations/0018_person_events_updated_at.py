@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 18:31
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_events_updated_at(apps, schema_editor):
+    Person = apps.get_model("bio", "Person")
+    Person.objects.update(events_updated_at=F("updated_at"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bio", "0017_changemarker"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="person",
+            name="events_updated_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                editable=False,
+                help_text="생애 사건 또는 증빙 자료가 마지막으로 바뀐 시각",
+            ),
+        ),
+        migrations.RunPython(backfill_events_updated_at, migrations.RunPython.noop),
+    ]
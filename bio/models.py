@@ -1,7 +1,43 @@
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
 from django.db import models
+from django.db.models.functions import Substr
 from django.utils import timezone
 from django.utils.text import slugify
 
+from .video import extract_video_metadata
+
+# Number of biography characters shown on person cards.
+SNIPPET_LENGTH = 160
+
+# Base slugs looked up per query; keeps the OR chain well under SQLite limits.
+SLUG_QUERY_CHUNK = 200
+
+# Characters of each turn kept in a chat session summary.
+SUMMARY_LINE_LENGTH = 120
+
+
+class PersonQuerySet(models.QuerySet):
+    def for_cards(self):
+        """Load only the columns person cards render, with a short biography."""
+        return self.only("id", "name", "slug", "image").annotate(
+            # One extra character tells the template the text was cut off.
+            bio_snippet=Substr("biography", 1, SNIPPET_LENGTH + 1)
+        )
+
+    def touch(self, events=False):
+        """
+        Set ``updated_at`` to now, e.g. when a related object changed, and
+        with ``events`` also ``events_updated_at``.
+        """
+        now = timezone.now()
+        if events:
+            return self.update(updated_at=now, events_updated_at=now)
+        return self.update(updated_at=now)
+
 
 class Person(models.Model):
     """인물 정보 모델"""
@@ -20,43 +56,104 @@ class Person(models.Model):
     )
     nationality = models.CharField(max_length=100, null=True, blank=True)
     chat_enabled = models.BooleanField(default=False, help_text="대화 기능 사용 여부")
+    import_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text="마지막으로 가져온 데이터의 해시",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
+    # Set in save() and touch() rather than with auto_now, so raw fixture
+    # loads without the field still get a value from the default.
+    updated_at = models.DateTimeField(
+        default=timezone.now,
+        editable=False,
+        db_index=True,
+        help_text="인물 또는 생애 사건, 증빙 자료, 댓글이 마지막으로 바뀐 시각",
+    )
+    # Version of the cached timeline fragments (see bio.fragments)
+    events_updated_at = models.DateTimeField(
+        default=timezone.now,
+        editable=False,
+        help_text="생애 사건 또는 증빙 자료가 마지막으로 바뀐 시각",
+    )
+
+    objects = PersonQuerySet.as_manager()
 
     def save(self, *args, **kwargs):
         if kwargs.get("raw", False):
             super().save(*args, **kwargs)
             return
 
-        if not self.slug:
-            self.slug = slugify(self.name, allow_unicode=True)
-
         # Ensure slug is unique
-        if Person.objects.filter(slug=self.slug).exclude(pk=self.pk).exists():
-            original_slug = self.slug
-            counter = 2
-            while Person.objects.filter(slug=self.slug).exclude(pk=self.pk).exists():
-                self.slug = f"{original_slug}-{counter}"
-                counter += 1
+        allocate_slugs([self])
 
+        self.updated_at = timezone.now()
         super().save(*args, **kwargs)
 
 
+def allocate_slugs(people):
+    """
+    Give each person a unique slug, as ``Person.save()`` does.
+
+    People without a slug get one from their name; taken slugs get the lowest
+    free ``-N`` suffix starting at 2. Existing ``slug``/``slug-N`` variants are
+    fetched in one query (per ``SLUG_QUERY_CHUNK`` base slugs), so this also
+    works for people about to be written with ``bulk_create``.
+    """
+    by_base = {}
+    for person in people:
+        base = person.slug or slugify(person.name, allow_unicode=True)
+        by_base.setdefault(base, []).append(person)
+
+    own_pks = [person.pk for person in people if person.pk is not None]
+    bases = list(by_base)
+    taken = set()
+    for start in range(0, len(bases), SLUG_QUERY_CHUNK):
+        condition = models.Q(slug__in=bases[start : start + SLUG_QUERY_CHUNK])
+        for base in bases[start : start + SLUG_QUERY_CHUNK]:
+            condition |= models.Q(slug__startswith=f"{base}-")
+        taken.update(
+            Person.objects.filter(condition)
+            .exclude(pk__in=own_pks)
+            .values_list("slug", flat=True)
+        )
+
+    for base, group in by_base.items():
+        counter = 2
+        for person in group:
+            slug = base
+            while slug in taken:
+                slug = f"{base}-{counter}"
+                counter += 1
+            person.slug = slug
+            taken.add(slug)
+
+
 class LifeEvent(models.Model):
     """인물의 생애 사건/이정표 모델"""
 
     person = models.ForeignKey(
-        Person, on_delete=models.CASCADE, related_name="life_events"
+        Person,
+        on_delete=models.CASCADE,
+        related_name="life_events",
+        db_index=False,  # covered by the (person, event_date) index
     )
     title = models.CharField(max_length=200)
     description = models.TextField()
     event_date = models.DateField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["person", "event_date"]),
+        ]
+
 
 class PersonClick(models.Model):
     """인물 상세 페이지 클릭 기록 모델"""
 
     person = models.ForeignKey(Person, on_delete=models.CASCADE, related_name="clicks")
-    viewed_at = models.DateTimeField(auto_now_add=True)
+    viewed_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         indexes = [
@@ -65,6 +162,26 @@ class PersonClick(models.Model):
         ordering = ["-viewed_at"]
 
 
+class ClickRollup(models.Model):
+    """인물별 시간 단위 클릭 집계 모델"""
+
+    person = models.ForeignKey(
+        Person, on_delete=models.CASCADE, related_name="click_rollups"
+    )
+    bucket = models.DateTimeField(help_text="집계 구간의 시작 시각 (UTC, 정시)")
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["person", "bucket"], name="unique_click_rollup_bucket"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["bucket", "person"]),
+        ]
+
+
 class Evidence(models.Model):
     """생애 사건/이정표의 증빙 자료 모델"""
 
@@ -83,7 +200,247 @@ class Evidence(models.Model):
     link_url = models.URLField(blank=True, null=True)
     image_file = models.ImageField(upload_to="evidences/images/", blank=True, null=True)
     video_file = models.FileField(upload_to="evidences/videos/", blank=True, null=True)
+    video_duration = models.FloatField(
+        null=True, blank=True, editable=False, help_text="영상 길이(초)"
+    )
+    video_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    video_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    video_poster = models.ImageField(
+        upload_to="evidences/posters/",
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="영상 대표 이미지",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"{self.life_event.title} - {self.get_evidence_type_display()}"
+
+    def save(self, *args, **kwargs):
+        new_video = bool(self.video_file) and not self.video_file._committed
+        super().save(*args, **kwargs)
+        if new_video:
+            self.update_video_metadata()
+
+    def update_video_metadata(self):
+        """영상 파일에서 길이, 크기, 대표 이미지를 추출해 저장"""
+        metadata, poster = extract_video_metadata(self.video_file)
+        self.video_duration = metadata.get("duration")
+        self.video_width = metadata.get("width")
+        self.video_height = metadata.get("height")
+        if poster:
+            name = os.path.splitext(os.path.basename(self.video_file.name))[0]
+            self.video_poster.save(f"{name}.jpg", ContentFile(poster), save=False)
+        self.save(
+            update_fields=[
+                "video_duration",
+                "video_width",
+                "video_height",
+                "video_poster",
+            ]
+        )
+
+
+class ChatPassage(models.Model):
+    """대화 답변의 근거로 쓰는 인물별 텍스트 조각"""
+
+    SOURCE_CHOICES = [
+        ("biography", "약력"),
+        ("event", "생애 사건"),
+        ("evidence", "증빙 자료"),
+    ]
+
+    person = models.ForeignKey(
+        Person,
+        on_delete=models.CASCADE,
+        related_name="chat_passages",
+        db_index=False,  # covered by the (person, position) index
+    )
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    life_event = models.ForeignKey(
+        LifeEvent,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="chat_passages",
+    )
+    text = models.TextField()
+    position = models.PositiveIntegerField(help_text="인물 안에서의 순서")
+
+    class Meta:
+        ordering = ["person", "position"]
+        indexes = [
+            models.Index(fields=["person", "position"]),
+        ]
+
+    def __str__(self):
+        return f"{self.person.name} - {self.get_source_display()} #{self.position}"
+
+
+class ChatSession(models.Model):
+    """
+    인물과의 대화 세션
+
+    최근 ``CHAT_HISTORY_TURNS``개의 턴만 그대로 답변에 쓰고, 그보다 오래된
+    턴은 ``summary``에 한 줄씩 접어 넣는다. 요약은 ``CHAT_SUMMARY_LENGTH``
+    글자를 넘지 않도록 오래된 줄부터 버리므로, 대화가 길어져도 요청마다
+    읽는 양이 일정하다.
+    """
+
+    person = models.ForeignKey(
+        Person, on_delete=models.CASCADE, related_name="chat_sessions"
+    )
+    summary = models.TextField(blank=True, help_text="창 밖으로 밀려난 턴의 요약")
+    summarized_until = models.PositiveBigIntegerField(
+        default=0, help_text="요약에 반영된 마지막 턴 id"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.person.name} - {self.created_at:%Y-%m-%d %H:%M}"
+
+    def recent_turns(self):
+        """답변에 그대로 쓰는 최근 턴 (오래된 것부터)"""
+        window = getattr(settings, "CHAT_HISTORY_TURNS", 10)
+        return list(self.turns.order_by("-pk")[:window])[::-1]
+
+    def turn_page(self, before=None, limit=20):
+        """
+        ``before`` 이전의 턴 ``limit``개를 오래된 것부터 불러온다.
+
+        Returns ``(turns, next_cursor)``; pass ``next_cursor`` back as
+        ``before`` for the page of older turns.
+        """
+        turns = self.turns.order_by("-pk")
+        if before:
+            turns = turns.filter(pk__lt=before)
+        turns = list(turns[: limit + 1])
+        next_cursor = None
+        if len(turns) > limit:
+            turns = turns[:limit]
+            next_cursor = turns[-1].pk
+        return turns[::-1], next_cursor
+
+    def add_turn(self, role, text):
+        """턴을 저장하고 창 밖으로 밀려난 턴을 요약에 접어 넣는다."""
+        turn = self.turns.create(role=role, text=text)
+        # Only the turns not yet summarized are read: the window plus the
+        # one just pushed out of it.
+        window = getattr(settings, "CHAT_HISTORY_TURNS", 10)
+        pending = list(self.turns.filter(pk__gt=self.summarized_until).order_by("pk"))
+        overflow = pending[: max(len(pending) - window, 0)]
+        if overflow:
+            self.summary = _fold_summary(self.summary, overflow)
+            self.summarized_until = overflow[-1].pk
+        self.save(update_fields=["summary", "summarized_until", "updated_at"])
+        return turn
+
+
+def _fold_summary(summary, turns):
+    """Append one shortened line per turn, dropping the oldest lines past the cap."""
+    limit = getattr(settings, "CHAT_SUMMARY_LENGTH", 2000)
+    lines = summary.splitlines() if summary else []
+    for turn in turns:
+        text = " ".join(turn.text.split())
+        if len(text) > SUMMARY_LINE_LENGTH:
+            text = text[: SUMMARY_LINE_LENGTH - 1] + "…"
+        lines.append(f"{turn.get_role_display()}: {text}")
+    while lines and len("\n".join(lines)) > limit:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class ChatTurn(models.Model):
+    """대화 세션의 메시지 하나"""
+
+    ROLE_CHOICES = [
+        ("user", "사용자"),
+        ("assistant", "인물"),
+    ]
+
+    session = models.ForeignKey(
+        ChatSession,
+        on_delete=models.CASCADE,
+        related_name="turns",
+        db_index=False,  # covered by the (session, id) index
+    )
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+    text = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["session", "id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.get_role_display()}: {self.text[:30]}"
+
+
+class ChangeMarkerQuerySet(models.QuerySet):
+    def mark(self, name):
+        """Record that ``name`` changed now."""
+        self.update_or_create(name=name, defaults={"changed_at": timezone.now()})
+
+    def changed_at(self, name):
+        """Return when ``name`` last changed, or ``None``."""
+        return self.filter(name=name).values_list("changed_at", flat=True).first()
+
+
+class ChangeMarker(models.Model):
+    """
+    변경 시각 표시
+
+    ``updated_at``에 남지 않는 변경(예: 인물 삭제)의 시각을 이름별로 기록해
+    목록 페이지의 Last-Modified/ETag에 반영한다.
+    """
+
+    name = models.CharField(max_length=50, unique=True)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    objects = ChangeMarkerQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.name} - {self.changed_at}"
+
+
+class ImportFileStorage(FileSystemStorage):
+    """가져오기용 업로드 파일 저장소 (MEDIA_URL로 공개되지 않음)"""
+
+    @property
+    def base_location(self):
+        return self._value_or_setting(self._location, settings.IMPORT_ROOT)
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+
+class ImportJob(models.Model):
+    """업로드된 데이터 가져오기 작업 모델"""
+
+    STATUS_CHOICES = [
+        ("pending", "대기"),
+        ("running", "실행 중"),
+        ("done", "완료"),
+        ("failed", "실패"),
+    ]
+
+    file = models.FileField(upload_to="uploads/", storage=ImportFileStorage)
+    original_name = models.CharField(max_length=255)
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default="pending", db_index=True
+    )
+    message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    @property
+    def is_finished(self):
+        return self.status in ("done", "failed")
@@ -0,0 +1,218 @@
+"""
+Retrieval of biography passages for ``bio_chat``.
+
+A person's biography, life events and text evidences are split into short
+``ChatPassage`` rows. On SQLite the ``bio_chatpassage_fts`` FTS5 table indexes
+them with the trigram tokenizer (substring matching works for Korean without
+word segmentation) and ranks matches with BM25. The person is part of the
+index, so a query only visits one person's passages. Triggers keep the index
+in sync with the passage rows, and ``index_people`` rewrites only the passages
+of the people it is given, so imports update the index incrementally.
+
+Other database backends fall back to ``icontains`` matching in passage order.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import ChatPassage, Evidence, LifeEvent, Person
+
+FTS_TABLE = "bio_chatpassage_fts"
+
+# Target passage length in characters; sentences are never split.
+PASSAGE_LENGTH = 400
+
+# The trigram tokenizer cannot match shorter terms.
+MIN_TERM_LENGTH = 3
+
+# Terms used in a query; long messages only keep their first ones.
+MAX_QUERY_TERMS = 32
+
+CONTENT_VIEW = "bio_chatpassage_fts_content"
+
+# The person is indexed as "#<id>#" so queries can require it in MATCH and
+# only rank that person's passages; its BM25 weight is zero.
+INDEX_SQL = [
+    f"""
+    CREATE VIEW IF NOT EXISTS {CONTENT_VIEW} AS
+    SELECT id, text, '#' || person_id || '#' AS person_key FROM bio_chatpassage
+    """,
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        text, person_key, content='{CONTENT_VIEW}', content_rowid='id',
+        tokenize='trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai
+    AFTER INSERT ON bio_chatpassage BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text, person_key)
+        VALUES (new.id, new.text, '#' || new.person_id || '#');
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad
+    AFTER DELETE ON bio_chatpassage BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text, person_key)
+        VALUES ('delete', old.id, old.text, '#' || old.person_id || '#');
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE ON bio_chatpassage BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text, person_key)
+        VALUES ('delete', old.id, old.text, '#' || old.person_id || '#');
+        INSERT INTO {FTS_TABLE}(rowid, text, person_key)
+        VALUES (new.id, new.text, '#' || new.person_id || '#');
+    END
+    """,
+    f"""
+    INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', 'bm25(1.0, 0.0)')
+    """,
+]
+
+DROP_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+    f"DROP VIEW IF EXISTS {CONTENT_VIEW}",
+]
+
+SENTENCE_END_RE = re.compile(r"(?<=[.!?。])\s+|\n+")
+
+TERM_RE = re.compile(r"\w+")
+
+
+def fts_available(using=connection):
+    return using.vendor == "sqlite"
+
+
+def install_index(using=connection):
+    """Create the FTS table and its triggers if they are missing."""
+    if not fts_available(using):
+        return
+    with using.cursor() as cursor:
+        for sql in INDEX_SQL:
+            cursor.execute(sql)
+
+
+def rebuild_index(using=connection):
+    """Recreate the FTS index contents from ``bio_chatpassage``."""
+    if not fts_available(using):
+        return
+    install_index(using)
+    with using.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def split_passages(text, length=PASSAGE_LENGTH):
+    """Split ``text`` into passages of about ``length`` characters."""
+    passages, current = [], ""
+    for sentence in SENTENCE_END_RE.split(text or ""):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if current and len(current) + 1 + len(sentence) > length:
+            passages.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        passages.append(current)
+    return passages
+
+
+def _person_passages(person, events, evidences):
+    """Return the unsaved passages of ``person`` in reading order."""
+    rows = [("biography", None, text) for text in split_passages(person.biography)]
+    for event in events:
+        header = f"{event.event_date.isoformat()} {event.title}"
+        for text in split_passages(event.description) or [""]:
+            rows.append(("event", event, f"{header}: {text}" if text else header))
+        for evidence in evidences.get(event.pk, []):
+            for text in split_passages(evidence.text_content):
+                rows.append(("evidence", event, f"{event.title}: {text}"))
+    return [
+        ChatPassage(
+            person=person, source=source, life_event=event, text=text, position=i
+        )
+        for i, (source, event, text) in enumerate(rows)
+    ]
+
+
+def index_people(person_ids):
+    """Replace the passages of ``person_ids`` with ones built from their data."""
+    person_ids = list(set(person_ids))
+    if not person_ids:
+        return 0
+    people = Person.objects.filter(pk__in=person_ids).only("id", "biography")
+    events = {}
+    for event in LifeEvent.objects.filter(person__in=person_ids).order_by(
+        "person", "event_date", "pk"
+    ):
+        events.setdefault(event.person_id, []).append(event)
+    evidences = {}
+    for evidence in (
+        Evidence.objects.filter(life_event__person__in=person_ids, evidence_type="text")
+        .exclude(text_content=None)
+        .exclude(text_content="")
+        .only("life_event_id", "text_content")
+        .order_by("pk")
+    ):
+        evidences.setdefault(evidence.life_event_id, []).append(evidence)
+
+    passages = []
+    for person in people:
+        passages += _person_passages(person, events.get(person.pk, []), evidences)
+    ChatPassage.objects.filter(person__in=person_ids).delete()
+    ChatPassage.objects.bulk_create(passages, batch_size=500)
+    return len(passages)
+
+
+def _query_terms(message):
+    """
+    Return the trigrams of the words in ``message``.
+
+    Korean words carry particles ("동의보감은"), so whole words rarely occur in
+    the passages; their trigrams do, and BM25 favours passages sharing more.
+    """
+    terms = {}
+    for word in TERM_RE.findall(message):
+        for i in range(len(word) - MIN_TERM_LENGTH + 1):
+            terms.setdefault(word[i : i + MIN_TERM_LENGTH].lower())
+    return list(terms)[:MAX_QUERY_TERMS]
+
+
+def retrieve_passages(person, message, k=5):
+    """
+    Return up to ``k`` of ``person``'s passages most relevant to ``message``.
+
+    Any term of the message may match (OR); BM25 ranks passages matching
+    more and rarer terms first. Without usable terms the first passages, which
+    open the biography, are returned.
+    """
+    terms = _query_terms(message)
+    passages = ChatPassage.objects.filter(person=person)
+    if not terms:
+        return list(passages.order_by("position")[:k])
+
+    if not fts_available():
+        condition = Q()
+        for term in terms:
+            condition |= Q(text__icontains=term)
+        return list(passages.filter(condition).order_by("position")[:k])
+
+    terms = " OR ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+    match = f'person_key : "#{person.pk}#" AND text : ({terms})'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            f"ORDER BY rank LIMIT %s",
+            [match, k],
+        )
+        pks = [pk for (pk,) in cursor.fetchall()]
+    by_pk = passages.in_bulk(pks)
+    return [by_pk[pk] for pk in pks if pk in by_pk]
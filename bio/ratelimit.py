@@ -0,0 +1,115 @@
+"""
+Per-client rate limiting for write endpoints.
+
+Each client IP gets a token bucket per endpoint, stored in the default cache.
+``RATE_LIMITS`` maps an endpoint name to ``(requests, seconds)``: a client may
+burst ``requests`` writes, and the bucket refills at ``requests / seconds``
+tokens per second. Endpoints missing from ``RATE_LIMITS`` (or set to ``None``)
+are not limited.
+
+The bucket is read and written without a lock, so concurrent requests of one
+client may occasionally both take the last token; the limit is meant to stop
+floods, not to count exactly.
+
+Clients are keyed by IP rather than session, since a bot can drop its session
+cookie on every request. Behind a proxy set ``RATE_LIMIT_IP_HEADER`` to the
+``request.META`` key carrying the client address (e.g. ``HTTP_X_REAL_IP``).
+"""
+
+import functools
+import hashlib
+import math
+import re
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+DEFAULT_BOT_USER_AGENT_RE = (
+    r"bot|crawl|spider|slurp|archiver|facebookexternalhit|headless"
+    r"|curl|wget|python-requests|python-urllib|httpx|aiohttp|go-http-client"
+)
+
+
+def client_ip(request):
+    header = getattr(settings, "RATE_LIMIT_IP_HEADER", None)
+    if header and request.META.get(header):
+        # X-Forwarded-For style headers list the client first
+        return request.META[header].split(",")[0].strip()
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def is_bot(request):
+    """Return whether the User-Agent looks like a crawler or script."""
+    pattern = getattr(settings, "BOT_USER_AGENT_RE", DEFAULT_BOT_USER_AGENT_RE)
+    user_agent = request.headers.get("User-Agent", "")
+    return bool(pattern and re.search(pattern, user_agent, re.IGNORECASE))
+
+
+def _bucket_key(endpoint, client):
+    digest = hashlib.md5(client.encode(), usedforsecurity=False).hexdigest()
+    return f"ratelimit:{endpoint}:{digest}"
+
+
+def take_token(request, endpoint):
+    """
+    Take a token from the client's ``endpoint`` bucket.
+
+    Returns ``0`` if the request is allowed, otherwise the seconds until a
+    token is available again.
+    """
+    limit = getattr(settings, "RATE_LIMITS", {}).get(endpoint)
+    if not limit:
+        return 0
+    capacity, period = limit
+    rate = capacity / period
+    key = _bucket_key(endpoint, client_ip(request))
+    now = time.time()
+
+    tokens, updated = cache.get(key, (capacity, now))
+    tokens = min(capacity, tokens + (now - updated) * rate)
+    if tokens < 1:
+        return (1 - tokens) / rate
+    # The bucket is full again after ``period`` seconds, so it can expire then
+    cache.set(key, (tokens - 1, now), timeout=math.ceil(period))
+    return 0
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse("Too many requests", status=429)
+    response.headers["Retry-After"] = str(max(math.ceil(retry_after), 1))
+    return response
+
+
+def rate_limit(endpoint, methods=("POST",)):
+    """
+    Decorate a view to answer ``429 Too Many Requests`` with ``Retry-After``
+    once the client's ``endpoint`` bucket is empty. Only ``methods`` take
+    tokens. Works for sync and async views.
+    """
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+
+            async def wrapper(request, *args, **kwargs):
+                if request.method in methods:
+                    retry_after = take_token(request, endpoint)
+                    if retry_after:
+                        return too_many_requests(retry_after)
+                return await view(request, *args, **kwargs)
+
+            markcoroutinefunction(wrapper)
+        else:
+
+            def wrapper(request, *args, **kwargs):
+                if request.method in methods:
+                    retry_after = take_token(request, endpoint)
+                    if retry_after:
+                        return too_many_requests(retry_after)
+                return view(request, *args, **kwargs)
+
+        return functools.wraps(view)(wrapper)
+
+    return decorator
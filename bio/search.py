@@ -0,0 +1,158 @@
+"""
+Full-text search over Person names and biographies.
+
+On SQLite the ``bio_person_fts`` FTS5 table indexes ``bio_person`` with the
+trigram tokenizer, which matches any substring of three or more characters and
+so works for Korean text without word segmentation. Triggers keep the index in
+sync with every insert, update and delete, including ``bulk_create`` and
+queryset updates. Shorter terms, and other database backends, fall back to
+``icontains`` filtering.
+"""
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Person
+
+FTS_TABLE = "bio_person_fts"
+
+# Name matches weigh more than biography matches when ranking.
+RANK_WEIGHTS = (10.0, 1.0)
+
+MIN_TERM_LENGTH = 3
+
+INDEX_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, biography, content='bio_person', content_rowid='id',
+        tokenize='trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON bio_person BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, biography)
+        VALUES (new.id, new.name, new.biography);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON bio_person BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, biography)
+        VALUES ('delete', old.id, old.name, old.biography);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF name, biography ON bio_person BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, biography)
+        VALUES ('delete', old.id, old.name, old.biography);
+        INSERT INTO {FTS_TABLE}(rowid, name, biography)
+        VALUES (new.id, new.name, new.biography);
+    END
+    """,
+    f"""
+    INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank)
+    VALUES ('rank', 'bm25({RANK_WEIGHTS[0]}, {RANK_WEIGHTS[1]})')
+    """,
+]
+
+DROP_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def fts_available(using=connection):
+    return using.vendor == "sqlite"
+
+
+def install_index(using=connection):
+    """
+    Create the FTS table and its triggers if they are missing.
+
+    SQLite drops triggers when Django rebuilds ``bio_person`` during a schema
+    change, so this also runs after every ``migrate``.
+    """
+    if not fts_available(using):
+        return
+    with using.cursor() as cursor:
+        for sql in INDEX_SQL:
+            cursor.execute(sql)
+
+
+def rebuild_index(using=connection):
+    """Recreate the index contents from ``bio_person``."""
+    if not fts_available(using):
+        return
+    install_index(using)
+    with using.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def _match_expression(terms):
+    # Quote every term so FTS5 operators in user input are matched literally.
+    return " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def _encode_cursor(rank, pk):
+    return str(pk) if rank is None else f"{rank!r}:{pk}"
+
+
+def _decode_cursor(cursor):
+    """Return ``(rank, pk)`` from a cursor string, or ``None`` if invalid."""
+    try:
+        rank, _, pk = cursor.rpartition(":")
+        return (float(rank) if rank else None), int(pk)
+    except ValueError:
+        return None
+
+
+def search_people(q, after=None, limit=20):
+    """
+    Return ``(people, next_cursor)`` for up to ``limit`` people matching ``q``.
+
+    Every whitespace-separated term has to appear in the name or biography.
+    Results come best match first; pass ``next_cursor`` back as ``after`` to
+    continue after the last result. ``next_cursor`` is ``None`` on the last
+    page.
+    """
+    terms = q.split()
+    if not terms:
+        return [], None
+    position = _decode_cursor(after) if after else None
+    people = Person.objects.for_cards()
+
+    if not fts_available() or min(len(term) for term in terms) < MIN_TERM_LENGTH:
+        condition = Q()
+        for term in terms:
+            condition &= Q(name__icontains=term) | Q(biography__icontains=term)
+        if position:
+            condition &= Q(pk__gt=position[1])
+        results = list(people.filter(condition).order_by("pk")[: limit + 1])
+        next_cursor = None
+        if len(results) > limit:
+            results = results[:limit]
+            next_cursor = _encode_cursor(None, results[-1].pk)
+        return results, next_cursor
+
+    sql = f"SELECT rowid, rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+    params = [_match_expression(terms)]
+    if position and position[0] is not None:
+        sql += " AND (rank > %s OR (rank = %s AND rowid > %s))"
+        params += [position[0], position[0], position[1]]
+    sql += " ORDER BY rank, rowid LIMIT %s"
+    params.append(limit + 1)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_pk, last_rank = rows[-1]
+        next_cursor = _encode_cursor(last_rank, last_pk)
+
+    people_by_pk = people.in_bulk([pk for pk, _ in rows])
+    return [people_by_pk[pk] for pk, _ in rows if pk in people_by_pk], next_cursor
@@ -0,0 +1,81 @@
+"""
+Signal receivers that keep per-person derived data in step with its sources.
+
+A change to a person's life events, evidences or comments marks the person as
+updated (``Person.updated_at``, used for conditional GET). Event and evidence
+changes also move ``Person.events_updated_at``, the version of the cached
+timeline fragments, so comments leave those fragments alone. Changes to the
+person, its events and evidences also rebuild its chat passages. Deleting a
+person marks the ``"people"`` ``ChangeMarker``, since no remaining
+``updated_at`` shows it.
+
+These only see writes through ``save()`` and ``delete()``; bulk writers call
+``Person.objects.touch(events=True)`` and ``passages.index_people`` themselves,
+and run inside ``bulk_import()`` so the deletes they do (which still send
+signals, also for cascaded rows) do not repeat that work once per row.
+"""
+
+import threading
+from contextlib import contextmanager
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from . import passages
+from .models import ChangeMarker, LifeEvent, Person
+
+_state = threading.local()
+
+
+@contextmanager
+def bulk_import():
+    """Skip the event, evidence and person receivers in this thread."""
+    _state.depth = getattr(_state, "depth", 0) + 1
+    try:
+        yield
+    finally:
+        _state.depth -= 1
+
+
+def _in_bulk_import():
+    return getattr(_state, "depth", 0) > 0
+
+
+def _events_changed(person_id):
+    if _in_bulk_import():
+        return
+    Person.objects.filter(pk=person_id).touch(events=True)
+    transaction.on_commit(lambda: passages.index_people([person_id]))
+
+
+def person_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and "biography" not in update_fields):
+        return
+    if _in_bulk_import():
+        return
+    transaction.on_commit(lambda: passages.index_people([instance.pk]))
+
+
+def person_deleted(sender, instance, **kwargs):
+    ChangeMarker.objects.mark("people")
+
+
+def life_event_changed(sender, instance, **kwargs):
+    _events_changed(instance.person_id)
+
+
+def evidence_changed(sender, instance, **kwargs):
+    if _in_bulk_import():
+        return
+    person_id = (
+        LifeEvent.objects.filter(pk=instance.life_event_id)
+        .values_list("person_id", flat=True)
+        .first()
+    )
+    if person_id is not None:
+        _events_changed(person_id)
+
+
+def comment_changed(sender, instance, **kwargs):
+    if instance.content_type_id == ContentType.objects.get_for_model(Person).pk:
+        Person.objects.filter(pk=instance.object_pk).touch()
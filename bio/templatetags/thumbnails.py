@@ -0,0 +1,27 @@
+from django import template
+
+from ..thumbnails import get_thumbnail
+
+register = template.Library()
+
+
+@register.simple_tag
+def thumbnail_url(field_file, width, format="jpeg", crop=False):
+    """``{% thumbnail_url person.image 80 %}``"""
+    if not field_file:
+        return ""
+    return get_thumbnail(field_file, int(width), format, crop)
+
+
+@register.simple_tag
+def srcset(field_file, *widths, format="jpeg", crop=False):
+    """
+    Return a ``srcset`` value with one candidate per width, e.g.
+    ``{% srcset person.image 80 160 format="webp" crop=True %}``.
+    """
+    if not field_file:
+        return ""
+    return ", ".join(
+        f"{get_thumbnail(field_file, int(width), format, crop)} {int(width)}w"
+        for width in widths
+    )
@@ -1,15 +1,77 @@
+import asyncio
 import json
+import os
+import struct
+import tempfile
+import threading
+import time
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
+from datetime import timedelta
 from unittest.mock import patch, call
-from django.test import TestCase, Client
+from django.template import Context, Template
+from django.template.loader import render_to_string
+from django.test import (
+    Client,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.asgi import ASGIHandler
+from django.core.signals import request_started
+from django.db import close_old_connections
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
 from django.contrib.messages import get_messages
+from django.utils import timezone, translation
+from PIL import Image
+
+from comment.models import Comment
+from .management.commands import load_result_data
+from .importer import iter_json_array
+from .jobs import claim_next_job
+from . import chat, fragments
+from .clicks import ClickBuffer, hour_bucket, save_clicks
+from .models import (
+    ChangeMarker,
+    ChatPassage,
+    ChatSession,
+    ChatTurn,
+    ClickRollup,
+    Evidence,
+    ImportJob,
+    LifeEvent,
+    Person,
+    PersonClick,
+    allocate_slugs,
+)
+from .passages import index_people, retrieve_passages, split_passages
+from .ratelimit import take_token
+from .search import search_people
+from .thumbnails import get_thumbnail
+from .video import read_mp4_metadata
+from .trending import get_leaderboard
 
 
 class FileUploadTests(TestCase):
     def setUp(self):
         self.client = Client()
         self.upload_url = reverse("upload_file")
+        import_root = tempfile.TemporaryDirectory()
+        self.addCleanup(import_root.cleanup)
+        settings_override = override_settings(IMPORT_ROOT=import_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
 
     def test_upload_page_get_request(self):
         """Test that the upload page loads correctly with a GET request."""
@@ -17,31 +79,73 @@ class FileUploadTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "upload.html")
 
-    @patch("bio.views.call_command")
-    def test_upload_valid_json_file(self, mock_call_command):
-        """Test uploading a valid JSON file."""
+    def test_upload_valid_json_file(self):
+        """Test that uploading a valid JSON file queues an import job."""
         json_data = {"name": "Test Person", "biography": "A test biography."}
         json_content = json.dumps(json_data).encode("utf-8")
         file = SimpleUploadedFile(
             "test.json", json_content, content_type="application/json"
         )
 
-        response = self.client.post(self.upload_url, {"file": file}, follow=True)
+        with patch("bio.jobs.call_command") as mock_call_command:
+            response = self.client.post(self.upload_url, {"file": file}, follow=True)
 
         self.assertRedirects(response, self.upload_url)
         messages = list(get_messages(response.wsgi_request))
         self.assertEqual(len(messages), 1)
-        self.assertEqual(str(messages[0]), "File processed successfully!")
-        self.assertEqual(mock_call_command.call_count, 1)
-        # Get the call arguments
-        args, kwargs = mock_call_command.call_args
-        # Check the command name
-        self.assertEqual(args[0], "load_result_data")
-        # Check the file path argument
-        self.assertTrue(args[1].startswith("--file="))
-        self.assertTrue(args[1].endswith(".json"))
-        # Check the update flag
-        self.assertEqual(args[2], "--update")
+        self.assertEqual(
+            str(messages[0]), "File uploaded. The import will run in the background."
+        )
+        # The import runs in the worker, not in the request
+        mock_call_command.assert_not_called()
+        job = ImportJob.objects.get()
+        self.assertEqual(job.status, "pending")
+        self.assertEqual(job.original_name, "test.json")
+        self.assertContains(response, 'hx-trigger="every 2s"')
+
+    def test_worker_imports_queued_file(self):
+        """Test that run_import_jobs imports the upload and finishes the job."""
+        json_data = {"name": "Test Person", "biography": "A test biography."}
+        file = SimpleUploadedFile("test.json", json.dumps(json_data).encode("utf-8"))
+        self.client.post(self.upload_url, {"file": file})
+        job = ImportJob.objects.get()
+        stored_path = job.file.path
+
+        call_command("run_import_jobs", "--once", stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done")
+        self.assertTrue(Person.objects.filter(name="Test Person").exists())
+        self.assertFalse(os.path.exists(stored_path))
+
+        response = self.client.get(reverse("import_job_status", args=[job.pk]))
+        self.assertContains(response, "완료")
+        self.assertNotContains(response, "hx-trigger")
+
+    def test_worker_fails_job_for_broken_file(self):
+        """Test that a file load_result_data cannot read fails the job."""
+        file = SimpleUploadedFile("broken.json", b'{"name": "Broken", ')
+        self.client.post(self.upload_url, {"file": file})
+
+        call_command("run_import_jobs", "--once", stdout=StringIO())
+
+        job = ImportJob.objects.get()
+        self.assertEqual(job.status, "failed")
+        self.assertIn("could not be loaded", job.message)
+        self.assertFalse(Person.objects.exists())
+
+    def test_worker_reclaims_stale_running_job(self):
+        """Test that a job left running by a dead worker is claimed again."""
+        json_data = {"name": "Test Person"}
+        file = SimpleUploadedFile("test.json", json.dumps(json_data).encode("utf-8"))
+        self.client.post(self.upload_url, {"file": file})
+        ImportJob.objects.update(status="running", started_at=timezone.now())
+        self.assertIsNone(claim_next_job())
+
+        ImportJob.objects.update(started_at=timezone.now() - timedelta(hours=2))
+        call_command("run_import_jobs", "--once", stdout=StringIO())
+        self.assertEqual(ImportJob.objects.get().status, "done")
+        self.assertTrue(Person.objects.filter(name="Test Person").exists())
 
     def test_upload_invalid_file_type(self):
         """Test uploading a file that is not a .json file."""
@@ -64,3 +168,1479 @@ class FileUploadTests(TestCase):
         messages = list(get_messages(response.wsgi_request))
         self.assertEqual(len(messages), 1)
         self.assertEqual(str(messages[0]), "No file part")
+
+
+class SlugAllocationTests(TestCase):
+    def test_save_resolves_collisions_in_one_query(self):
+        """Test that saving a duplicate name looks up taken slugs once."""
+        for _ in range(5):
+            Person.objects.create(name="Common Name")
+        person = Person(name="Common Name")
+        with self.assertNumQueries(1):
+            allocate_slugs([person])
+        self.assertEqual(person.slug, "common-name-6")
+
+    def test_lowest_free_suffix_is_used(self):
+        """Test that a gap in the suffixes is filled first."""
+        Person.objects.create(name="Name", slug="name")
+        Person.objects.create(name="Name", slug="name-3")
+        Person.objects.create(name="Name Other", slug="name-other")
+        self.assertEqual(Person.objects.create(name="Name").slug, "name-2")
+
+    def test_resaving_keeps_own_slug(self):
+        """Test that a person does not collide with itself."""
+        person = Person.objects.create(name="Name")
+        person.save()
+        self.assertEqual(person.slug, "name")
+
+    def test_allocates_unique_slugs_for_bulk_create(self):
+        """Test that a batch of unsaved people gets distinct slugs."""
+        Person.objects.create(name="Name")
+        people = [Person(name="Name"), Person(name="Name"), Person(name="Other")]
+        with self.assertNumQueries(1):
+            allocate_slugs(people)
+        Person.objects.bulk_create(people)
+        self.assertEqual(
+            [person.slug for person in people], ["name-2", "name-3", "other"]
+        )
+
+
+class ClickRecordingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.person = Person.objects.create(name="Test Person")
+
+    @override_settings(CLICK_RECORDING_MODE="sync")
+    def test_sync_mode_records_click_per_view(self):
+        """Test that each bio page view writes a click in sync mode."""
+        url = reverse("bio_detail", args=[self.person.slug])
+        self.client.get(url)
+        self.client.get(url)
+        self.assertEqual(PersonClick.objects.filter(person=self.person).count(), 2)
+
+    @override_settings(CLICK_RECORDING_MODE="sync")
+    def test_bots_are_not_counted(self):
+        url = reverse("bio_detail", args=[self.person.slug])
+        response = self.client.get(url, headers={"User-Agent": "Googlebot/2.1"})
+        self.assertEqual(response.status_code, 200)
+        self.client.get(url, headers={"User-Agent": "Mozilla/5.0 (X11; Linux)"})
+        self.assertEqual(PersonClick.objects.count(), 1)
+
+    @override_settings(CLICK_RECORDING_MODE="sync", RATE_LIMITS={"click": (2, 60)})
+    def test_clicks_over_the_limit_are_not_counted(self):
+        url = reverse("bio_detail", args=[self.person.slug])
+        for _ in range(4):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(PersonClick.objects.count(), 2)
+
+    def test_buffer_flushes_on_size_threshold(self):
+        """Test that the buffer writes all clicks once it is full."""
+        buffer = ClickBuffer(max_size=3, flush_interval=3600)
+        buffer.add(self.person.pk)
+        buffer.add(self.person.pk)
+        self.assertEqual(PersonClick.objects.count(), 0)
+        with patch("bio.clicks.save_clicks", wraps=save_clicks) as mock_save:
+            buffer.add(self.person.pk)
+        self.assertEqual(mock_save.call_count, 1)
+        self.assertEqual(PersonClick.objects.count(), 3)
+        self.assertEqual(len(buffer), 0)
+
+    def test_buffer_flushes_on_age_threshold(self):
+        """Test that a click older than the interval triggers a flush."""
+        buffer = ClickBuffer(max_size=100, flush_interval=60)
+        buffer.add(self.person.pk)
+        self.assertEqual(PersonClick.objects.count(), 0)
+        with patch("bio.clicks.time.monotonic", return_value=time.monotonic() + 60):
+            buffer.add(self.person.pk)
+        self.assertEqual(PersonClick.objects.count(), 2)
+
+    def test_buffer_keeps_view_time(self):
+        """Test that flushed clicks keep the time they were recorded at."""
+        buffer = ClickBuffer(max_size=100, flush_interval=3600)
+        viewed_at = timezone.now() - timedelta(minutes=5)
+        buffer.add(self.person.pk, viewed_at)
+        buffer.flush()
+        self.assertEqual(PersonClick.objects.get().viewed_at, viewed_at)
+
+
+class ClickRollupTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.alice = Person.objects.create(name="Alice")
+        self.bob = Person.objects.create(name="Bob")
+        self.now = timezone.now()
+        cache.clear()
+
+    def test_saved_clicks_increment_hourly_buckets(self):
+        """Test that clicks are added to the bucket of the hour they fall in."""
+        save_clicks([(self.alice.pk, self.now), (self.alice.pk, self.now)])
+        save_clicks([(self.alice.pk, self.now)])
+        rollup = ClickRollup.objects.get(person=self.alice)
+        self.assertEqual(rollup.bucket, hour_bucket(self.now))
+        self.assertEqual(rollup.count, 3)
+
+    def test_trending_sums_buckets_in_period(self):
+        """Test that trending orders people by clicks within the period."""
+        save_clicks([(self.alice.pk, self.now)])
+        save_clicks([(self.bob.pk, self.now - timedelta(days=3))] * 2)
+
+        response = self.client.get(reverse("trending"), {"period": "day"})
+        self.assertEqual(list(response.context["people"]), [self.alice])
+
+        response = self.client.get(reverse("trending"), {"period": "week"})
+        self.assertEqual(list(response.context["people"]), [self.bob, self.alice])
+
+    def test_prune_keeps_rollups(self):
+        """Test that pruning raw clicks does not change trending counts."""
+        save_clicks([(self.bob.pk, self.now - timedelta(days=60))])
+        call_command("rollup_clicks", "--prune=31", stdout=StringIO())
+        self.assertFalse(PersonClick.objects.exists())
+
+        response = self.client.get(reverse("trending"), {"period": "all"})
+        self.assertEqual(list(response.context["people"]), [self.bob])
+
+    def test_rebuild_recomputes_buckets_from_raw_clicks(self):
+        """Test that --rebuild restores buckets from stored raw clicks."""
+        PersonClick.objects.create(person=self.alice, viewed_at=self.now)
+        PersonClick.objects.create(person=self.alice, viewed_at=self.now)
+        call_command("rollup_clicks", "--rebuild", stdout=StringIO())
+        self.assertEqual(ClickRollup.objects.get(person=self.alice).count, 2)
+
+
+class TrendingCacheTests(TestCase):
+    def setUp(self):
+        self.alice = Person.objects.create(name="Alice")
+        self.bob = Person.objects.create(name="Bob")
+        cache.clear()
+
+    def test_leaderboard_is_served_from_cache(self):
+        """Test that a fresh leaderboard is not recomputed."""
+        save_clicks([(self.alice.pk, timezone.now())])
+        self.assertEqual(get_leaderboard("day"), [(self.alice.pk, 1)])
+
+        save_clicks([(self.bob.pk, timezone.now())] * 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_leaderboard("day"), [(self.alice.pk, 1)])
+
+    def test_stale_leaderboard_is_served_during_recomputation(self):
+        """Test that only the lock holder recomputes a stale leaderboard."""
+        save_clicks([(self.alice.pk, timezone.now())])
+        get_leaderboard("day")
+        save_clicks([(self.bob.pk, timezone.now())] * 2)
+
+        with patch("bio.trending.time.time", return_value=time.time() + 600):
+            cache.add("bio:trending:day:lock", True)
+            with self.assertNumQueries(0):
+                self.assertEqual(get_leaderboard("day"), [(self.alice.pk, 1)])
+
+            cache.delete("bio:trending:day:lock")
+            self.assertEqual(
+                get_leaderboard("day"), [(self.bob.pk, 2), (self.alice.pk, 1)]
+            )
+
+    @patch("bio.views.PAGE_SIZE", 1)
+    def test_trending_pages_through_leaderboard(self):
+        """Test that trending serves the leaderboard one page at a time."""
+        save_clicks([(self.alice.pk, timezone.now())])
+        save_clicks([(self.bob.pk, timezone.now())] * 2)
+        response = Client().get(reverse("trending"))
+        self.assertEqual(list(response.context["people"]), [self.bob])
+
+        response = Client().get(
+            response.context["more_url"], headers={"HX-Request": "true"}
+        )
+        self.assertTemplateUsed(response, "_person_cards.html")
+        self.assertEqual(list(response.context["people"]), [self.alice])
+
+    @override_settings(TRENDING_LIMIT=1)
+    def test_leaderboard_is_limited_to_top_n(self):
+        """Test that only the busiest TRENDING_LIMIT people are kept."""
+        save_clicks([(self.alice.pk, timezone.now())])
+        save_clicks([(self.bob.pk, timezone.now())] * 2)
+        response = Client().get(reverse("trending"), {"period": "all"})
+        self.assertEqual(list(response.context["people"]), [self.bob])
+
+
+@override_settings(CLICK_RECORDING_MODE="sync")
+class TimelineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.person = Person.objects.create(name="세종")
+        for year, month in [(1418, 8), (1443, 12), (1443, 1), (1450, 2)]:
+            LifeEvent.objects.create(
+                person=self.person,
+                title=f"{year}-{month}",
+                description="사건",
+                event_date=f"{year}-{month:02d}-01",
+            )
+        LifeEvent.objects.create(
+            person=Person.objects.create(name="태종"),
+            title="다른 사람",
+            description="사건",
+            event_date="1400-01-01",
+        )
+        self.url = reverse("bio_detail", args=[self.person.slug])
+
+    def test_years_and_default_year(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.context["years"], [1418, 1443, 1450])
+        self.assertEqual(response.context["selected_year"], 1418)
+        self.assertEqual(
+            [event.title for event in response.context["life_events"]], ["1418-8"]
+        )
+
+    def test_selected_year_events_in_date_order(self):
+        response = self.client.get(self.url, {"year": 1443})
+        self.assertEqual(
+            [event.title for event in response.context["life_events"]],
+            ["1443-1", "1443-12"],
+        )
+
+    def test_year_list_is_one_distinct_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        year_queries = [
+            query["sql"]
+            for query in queries.captured_queries
+            if "DISTINCT" in query["sql"] and "bio_lifeevent" in query["sql"]
+        ]
+        self.assertEqual(len(year_queries), 1)
+
+    def test_htmx_year_switch_skips_year_list(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {"year": 1450}, HTTP_HX_REQUEST="true")
+        self.assertTemplateUsed(response, "_event_list.html")
+        self.assertContains(response, "1450-2")
+        self.assertFalse(
+            any("DISTINCT" in query["sql"] for query in queries.captured_queries)
+        )
+
+    def test_out_of_range_year(self):
+        response = self.client.get(self.url, {"year": 99999})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["life_events"]), [])
+
+
+@override_settings(CLICK_RECORDING_MODE="sync")
+class EventFragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        fragments.reset_stats()
+        self.client = Client()
+        self.person = Person.objects.create(name="장영실")
+        self.event = LifeEvent.objects.create(
+            person=self.person,
+            title="자격루 제작",
+            description="물시계",
+            event_date="1434-07-01",
+        )
+        self.url = reverse("bio_detail", args=[self.person.slug])
+
+    def get_events(self, url=None):
+        return self.client.get(url or self.url, {"year": 1434}, HTTP_HX_REQUEST="true")
+
+    def test_htmx_year_switch_is_served_from_cache(self):
+        self.get_events()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get_events()
+        self.assertFalse(
+            any(
+                "bio_lifeevent" in query["sql"] or "bio_evidence" in query["sql"]
+                for query in queries.captured_queries
+            )
+        )
+        self.assertContains(response, "자격루 제작")
+        self.assertEqual(fragments.fragment_stats(), {"hits": 1, "misses": 1})
+
+    def test_initial_render_shares_the_fragment(self):
+        self.get_events()
+        response = self.client.get(self.url)
+        self.assertContains(response, "자격루 제작")
+        self.assertEqual(fragments.fragment_stats(), {"hits": 1, "misses": 1})
+
+    def test_language_is_part_of_the_key(self):
+        self.get_events()
+        with translation.override("ko"):
+            self.get_events(reverse("bio_detail", args=[self.person.slug]))
+        self.assertEqual(fragments.fragment_stats()["misses"], 2)
+
+    def test_comments_keep_the_fragments(self):
+        self.get_events()
+        Comment.objects.create(
+            content_object=self.person, user_name="독자", comment="좋아요"
+        )
+        self.assertContains(self.get_events(), "자격루 제작")
+        self.assertEqual(fragments.fragment_stats(), {"hits": 1, "misses": 1})
+
+    def test_writes_from_another_process_invalidate(self):
+        """Test that a write with a different (per-process) cache is seen."""
+        self.assertContains(self.get_events(), "자격루 제작")
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump(
+                {
+                    "name": "장영실",
+                    "life_events": [
+                        {
+                            "title": "옥루 제작",
+                            "description": "천문 물시계",
+                            "event_date": "1434-01-07",
+                        }
+                    ],
+                },
+                f,
+            )
+        self.addCleanup(os.unlink, f.name)
+        other_process_cache = LocMemCache("other-process", {})
+        with patch("bio.fragments.cache", other_process_cache):
+            call_command("load_result_data", "--update", file=f.name, stdout=StringIO())
+            with self.captureOnCommitCallbacks(execute=True):
+                Evidence.objects.create(
+                    life_event=LifeEvent.objects.get(title="옥루 제작"),
+                    evidence_type="text",
+                    text_content="세종실록",
+                )
+        response = self.get_events()
+        self.assertContains(response, "옥루 제작")
+        self.assertContains(response, "세종실록")
+        self.assertNotContains(response, "자격루 제작")
+
+    def test_event_and_evidence_writes_invalidate(self):
+        self.get_events()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.title = "앙부일구 제작"
+            self.event.save()
+        self.assertContains(self.get_events(), "앙부일구 제작")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Evidence.objects.create(
+                life_event=self.event, evidence_type="text", text_content="세종실록"
+            )
+        self.assertContains(self.get_events(), "세종실록")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.delete()
+        self.assertNotContains(self.get_events(), "앙부일구 제작")
+        self.assertEqual(fragments.fragment_stats(), {"hits": 0, "misses": 4})
+
+    def test_bulk_import_invalidates(self):
+        self.get_events()
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump(
+                {
+                    "name": "장영실",
+                    "life_events": [
+                        {
+                            "title": "측우기 제작",
+                            "description": "강우량 측정",
+                            "event_date": "1434-05-19",
+                        }
+                    ],
+                },
+                f,
+            )
+        self.addCleanup(os.unlink, f.name)
+        call_command("load_result_data", file=f.name, stdout=StringIO())
+        self.assertContains(self.get_events(), "측우기 제작")
+
+
+@override_settings(CLICK_RECORDING_MODE="sync")
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.person = Person.objects.create(name="정약용")
+        self.url = reverse("bio_detail", args=[self.person.slug])
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    def test_fixture_without_updated_at_loads(self):
+        """Test that raw fixture saves get ``updated_at`` from its default."""
+        call_command("loaddata", "bio_data", verbosity=0)
+        self.assertFalse(Person.objects.filter(updated_at=None).exists())
+
+    def test_save_moves_updated_at(self):
+        before = self.person.updated_at
+        self.person.biography = "실학자"
+        self.person.save()
+        self.person.refresh_from_db()
+        self.assertGreater(self.person.updated_at, before)
+
+    def test_bio_detail_not_modified_still_counts_the_click(self):
+        response = self.client.get(self.url)
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        with self.assertTemplateNotUsed("bio_detail.html"):
+            not_modified = self.revalidate(self.url, response)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified["ETag"], response["ETag"])
+        self.assertEqual(PersonClick.objects.filter(person=self.person).count(), 2)
+
+    def test_if_modified_since(self):
+        response = self.client.get(self.url)
+        not_modified = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_related_changes_update_the_person(self):
+        response = self.client.get(self.url)
+        changes = [
+            lambda: LifeEvent.objects.create(
+                person=self.person,
+                title="목민심서",
+                description="저술",
+                event_date="1818-01-01",
+            ),
+            lambda: Evidence.objects.create(
+                life_event=LifeEvent.objects.get(person=self.person),
+                evidence_type="text",
+                text_content="여유당전서",
+            ),
+            lambda: Comment.objects.create(
+                content_object=self.person, user_name="독자", comment="좋아요"
+            ),
+        ]
+        for change in changes:
+            with self.subTest(change=change):
+                Person.objects.filter(pk=self.person.pk).update(
+                    updated_at=timezone.now() - timedelta(days=1)
+                )
+                response = self.client.get(self.url)
+                change()
+                self.assertEqual(self.revalidate(self.url, response).status_code, 200)
+
+    def test_year_and_htmx_variants_have_their_own_etag(self):
+        full = self.client.get(self.url)
+        partial = self.client.get(self.url, {"year": 1818}, HTTP_HX_REQUEST="true")
+        self.assertNotEqual(full["ETag"], partial["ETag"])
+
+    def test_listing_pages_change_with_any_person(self):
+        for url in [reverse("home"), reverse("explore") + "?q=정약용"]:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(self.revalidate(url, response).status_code, 304)
+                other = Person.objects.create(name="정약전")
+                self.assertEqual(self.revalidate(url, response).status_code, 200)
+                # Last-Modified has one-second resolution
+                yesterday = timezone.now() - timedelta(days=1)
+                Person.objects.update(updated_at=yesterday)
+                ChangeMarker.objects.update(changed_at=yesterday)
+                response = self.client.get(url)
+                other.delete()
+                self.assertEqual(self.revalidate(url, response).status_code, 200)
+                not_modified = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+                )
+                self.assertEqual(not_modified.status_code, 200)
+
+    def test_listing_validators_do_not_scan_people(self):
+        response = self.client.get(reverse("home"))
+        with CaptureQueriesContext(connection) as queries:
+            self.revalidate(reverse("home"), response)
+        sql = " ".join(query["sql"] for query in queries.captured_queries)
+        self.assertNotIn("COUNT(", sql)
+        self.assertIn('MAX("bio_person"."updated_at")', sql)
+
+
+class ThumbnailTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.media_root = media_root.name
+
+        buffer = BytesIO()
+        Image.new("RGBA", (400, 200), (255, 0, 0, 128)).save(buffer, "PNG")
+        self.person = Person.objects.create(
+            name="신사임당",
+            image=SimpleUploadedFile("portrait.png", buffer.getvalue()),
+        )
+
+    def open_thumbnail(self, url):
+        return Image.open(os.path.join(self.media_root, url.removeprefix("/media/")))
+
+    def test_resized_variants_are_cached_on_disk(self):
+        url = get_thumbnail(self.person.image, 100, "webp")
+        self.assertEqual(url, "/media/thumbs/100/persons/portrait.webp")
+        with self.open_thumbnail(url) as image:
+            self.assertEqual((image.format, image.size), ("WEBP", (100, 50)))
+
+        with patch("bio.thumbnails._save") as save:
+            self.assertEqual(get_thumbnail(self.person.image, 100, "webp"), url)
+        save.assert_not_called()
+
+    def test_square_jpeg_crop(self):
+        url = get_thumbnail(self.person.image, 80, "jpeg", crop=True)
+        with self.open_thumbnail(url) as image:
+            self.assertEqual((image.format, image.size), ("JPEG", (80, 80)))
+
+    def test_never_upscales(self):
+        url = get_thumbnail(self.person.image, 1000)
+        with self.open_thumbnail(url) as image:
+            self.assertEqual(image.size, (400, 200))
+
+    def test_unreadable_image_falls_back_to_original(self):
+        person = Person.objects.create(
+            name="이이", image=SimpleUploadedFile("broken.png", b"not an image")
+        )
+        with self.assertLogs("bio.thumbnails", "WARNING"):
+            self.assertEqual(get_thumbnail(person.image, 80), person.image.url)
+
+    def test_srcset_tag(self):
+        html = Template(
+            "{% load thumbnails %}{% srcset image 64 128 format='webp' crop=True %}"
+        ).render(Context({"image": self.person.image}))
+        self.assertEqual(
+            html,
+            "/media/thumbs/64x64/persons/portrait.webp 64w, "
+            "/media/thumbs/128x128/persons/portrait.webp 128w",
+        )
+
+    def test_cards_use_thumbnails(self):
+        response = Client().get(reverse("home"))
+        self.assertContains(response, "/media/thumbs/80x80/persons/portrait.webp 80w")
+        self.assertNotContains(response, 'src="/media/persons/portrait.png"')
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        os.makedirs(os.path.join(media_root.name, "evidences", "videos"))
+        with open(
+            os.path.join(media_root.name, "evidences", "videos", "clip.mp4"), "wb"
+        ) as f:
+            f.write(bytes(range(100)))
+        self.url = reverse("media", args=["evidences/videos/clip.mp4"])
+
+    def test_full_file(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), bytes(range(100)))
+        self.assertEqual(response["Content-Type"], "video/mp4")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn("ETag", response)
+
+    def test_byte_ranges(self):
+        cases = [
+            ("bytes=10-19", "bytes 10-19/100", bytes(range(10, 20))),
+            ("bytes=95-", "bytes 95-99/100", bytes(range(95, 100))),
+            ("bytes=-3", "bytes 97-99/100", bytes(range(97, 100))),
+            ("bytes=90-200", "bytes 90-99/100", bytes(range(90, 100))),
+        ]
+        for header, content_range, body in cases:
+            with self.subTest(header=header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response["Content-Range"], content_range)
+                self.assertEqual(response["Content-Length"], str(len(body)))
+                self.assertEqual(b"".join(response.streaming_content), body)
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=100-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */100")
+
+    def test_multiple_ranges_and_stale_if_range_get_the_full_file(self):
+        for headers in [
+            {"HTTP_RANGE": "bytes=0-1,5-6"},
+            {"HTTP_RANGE": "bytes=0-1", "HTTP_IF_RANGE": '"stale"'},
+        ]:
+            with self.subTest(headers=headers):
+                self.assertEqual(self.client.get(self.url, **headers).status_code, 200)
+
+    def test_etag_revalidation(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_path_traversal_and_missing_files(self):
+        for path in ["../settings.py", "evidences", "evidences/videos/none.mp4"]:
+            with self.subTest(path=path):
+                response = self.client.get(reverse("media", args=[path]))
+                self.assertEqual(response.status_code, 404)
+
+    @override_settings(MEDIA_SENDFILE="x-accel-redirect")
+    def test_x_accel_redirect(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-9")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response["X-Accel-Redirect"], "/protected-media/evidences/videos/clip.mp4"
+        )
+        self.assertEqual(response.content, b"")
+
+    @override_settings(MEDIA_SENDFILE="x-sendfile")
+    def test_x_sendfile(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response["X-Sendfile"].endswith("evidences/videos/clip.mp4"))
+
+
+class AsgiMediaStreamingTests(SimpleTestCase):
+    size = 5 * 64 * 1024 + 10
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.body = os.urandom(self.size)
+        with open(os.path.join(media_root.name, "clip.mp4"), "wb") as f:
+            f.write(self.body)
+        # Like AsyncClient: keep the handler away from the database
+        request_started.disconnect(close_old_connections)
+        self.addCleanup(request_started.connect, close_old_connections)
+
+    async def request(self, headers=()):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": reverse("media", args=["clip.mp4"]),
+            "query_string": b"",
+            "headers": [(b"host", b"testserver"), *headers],
+            "server": ("testserver", 80),
+            "client": ("127.0.0.1", 12345),
+        }
+        received = [{"type": "http.request", "body": b"", "more_body": False}]
+        messages = []
+
+        async def receive():
+            if received:
+                return received.pop()
+            await asyncio.Event().wait()
+
+        async def send(message):
+            messages.append(message)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            await ASGIHandler()(scope, receive, send)
+        start = messages[0]
+        chunks = [m["body"] for m in messages[1:] if m.get("body")]
+        return start, chunks
+
+    async def test_full_file_is_streamed_in_chunks(self):
+        start, chunks = await self.request()
+        self.assertEqual(start["status"], 200)
+        self.assertEqual(len(chunks), 6)
+        self.assertEqual(b"".join(chunks), self.body)
+        headers = dict(start["headers"])
+        self.assertEqual(headers[b"Content-Length"], str(self.size).encode())
+
+    async def test_range_is_streamed_in_chunks(self):
+        start, chunks = await self.request([(b"range", b"bytes=0-")])
+        self.assertEqual(start["status"], 206)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(b"".join(chunks), self.body)
+
+
+def mp4_box(box_type, payload=b""):
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def make_mp4(duration=12.5, width=1920, height=1080, rotated=False):
+    """A minimal MP4: ftyp, moov with one video track, and an mdat."""
+    mvhd = mp4_box(b"mvhd", bytes(12) + struct.pack(">II", 1000, int(duration * 1000)))
+    matrix = (0, 0x10000, 0) if rotated else (0x10000, 0, 0)
+    tkhd = mp4_box(
+        b"tkhd",
+        bytes(4 + 20 + 16)
+        + struct.pack(">3i", *matrix)
+        + bytes(24)
+        + struct.pack(">II", width << 16, height << 16),
+    )
+    hdlr = mp4_box(b"hdlr", bytes(8) + b"vide" + bytes(12))
+    sound = mp4_box(
+        b"trak",
+        mp4_box(b"tkhd", bytes(76) + struct.pack(">II", 0, 0))
+        + mp4_box(b"mdia", mp4_box(b"hdlr", bytes(8) + b"soun" + bytes(12))),
+    )
+    video = mp4_box(b"trak", tkhd + mp4_box(b"mdia", hdlr))
+    return (
+        mp4_box(b"ftyp", b"isom" + bytes(4))
+        + mp4_box(b"moov", mvhd + sound + video)
+        + mp4_box(b"mdat", bytes(1000))
+    )
+
+
+def fake_poster(path, duration):
+    buffer = BytesIO()
+    Image.new("RGB", (32, 18), "blue").save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+@override_settings(VIDEO_POSTER_EXTRACTOR="bio.tests.fake_poster")
+class VideoMetadataTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.event = LifeEvent.objects.create(
+            person=Person.objects.create(name="김구"),
+            title="귀국",
+            description="환국",
+            event_date="1945-11-23",
+        )
+
+    def test_read_mp4_metadata(self):
+        self.assertEqual(
+            read_mp4_metadata(BytesIO(make_mp4())),
+            {"duration": 12.5, "width": 1920, "height": 1080},
+        )
+
+    def test_rotated_video_swaps_dimensions(self):
+        metadata = read_mp4_metadata(BytesIO(make_mp4(rotated=True)))
+        self.assertEqual((metadata["width"], metadata["height"]), (1080, 1920))
+
+    def test_large_box_size_and_invalid_files(self):
+        large_mdat = struct.pack(">I4sQ", 1, b"mdat", 16 + 4) + bytes(4)
+        data = mp4_box(b"ftyp", b"isom") + large_mdat + make_mp4()[16:]
+        self.assertEqual(read_mp4_metadata(BytesIO(data))["duration"], 12.5)
+        for data in [b"not a video", mp4_box(b"ftyp", b"isom")]:
+            with self.subTest(data=data):
+                with self.assertRaises(ValueError):
+                    read_mp4_metadata(BytesIO(data))
+
+    def test_upload_stores_metadata_and_poster(self):
+        evidence = Evidence.objects.create(
+            life_event=self.event,
+            evidence_type="video",
+            video_file=SimpleUploadedFile("return.mp4", make_mp4(duration=3)),
+        )
+        evidence.refresh_from_db()
+        self.assertEqual(evidence.video_duration, 3)
+        self.assertEqual((evidence.video_width, evidence.video_height), (1920, 1080))
+        self.assertEqual(evidence.video_poster.name, "evidences/posters/return.jpg")
+
+        html = render_to_string("_event_list.html", {"life_events": [self.event]})
+        self.assertIn('preload="none"', html)
+        self.assertIn('poster="/media/thumbs/640/evidences/posters/return.jpeg"', html)
+        self.assertIn('width="1920" height="1080"', html)
+
+    @override_settings(VIDEO_POSTER_EXTRACTOR=None)
+    def test_backfill_command(self):
+        evidence = Evidence.objects.create(
+            life_event=self.event,
+            evidence_type="video",
+            video_file=SimpleUploadedFile("return.mp4", make_mp4()),
+        )
+        Evidence.objects.filter(pk=evidence.pk).update(video_duration=None)
+        out = StringIO()
+        call_command("extract_video_metadata", stdout=out)
+        self.assertIn("Processed 1 videos", out.getvalue())
+        evidence.refresh_from_db()
+        self.assertEqual(evidence.video_duration, 12.5)
+        self.assertFalse(evidence.video_poster)
+
+
+class DatabaseProfileTests(TestCase):
+    def test_pragmas_are_applied_to_new_connections(self):
+        db_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(db_dir.cleanup)
+        wrapper = SQLiteDatabaseWrapper(
+            {**connection.settings_dict, "NAME": os.path.join(db_dir.name, "t.db")},
+            alias="pragma_test",
+        )
+        self.addCleanup(wrapper.close)
+        pragmas = {"journal_mode": "WAL", "synchronous": "NORMAL", "busy_timeout": 1234}
+        with override_settings(SQLITE_PRAGMAS=pragmas):
+            with wrapper.cursor() as cursor:
+                values = [
+                    cursor.execute(f"PRAGMA {name}").fetchone()[0] for name in pragmas
+                ]
+        self.assertEqual(values, ["wal", 1, 1234])
+
+    def test_invalid_pragma_is_rejected(self):
+        wrapper = SQLiteDatabaseWrapper(
+            {**connection.settings_dict, "NAME": ":memory:"}, alias="pragma_test"
+        )
+        self.addCleanup(wrapper.close)
+        with override_settings(SQLITE_PRAGMAS={"journal_mode": "WAL; DROP TABLE x"}):
+            with self.assertRaises(ValueError):
+                wrapper.ensure_connection()
+
+
+class BenchmarkCommandTests(TransactionTestCase):
+    def test_benchmark_cleans_up_after_itself(self):
+        out = StringIO()
+        call_command(
+            "benchmark_db", "--threads=1", "--duration=0.2", "--json", stdout=out
+        )
+        result = json.loads(out.getvalue())
+        self.assertGreater(result["reads_per_s"] + result["writes_per_s"], 0)
+        self.assertFalse(Person.objects.exists())
+        self.assertFalse(PersonClick.objects.exists())
+
+
+class LoadTestCommandTests(TestCase):
+    def test_reports_each_target(self):
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                status = 404 if self.path == "/missing/" else 200
+                self.send_response(status)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"ok")
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_port}"
+
+        out = StringIO()
+        call_command(
+            "load_test",
+            f"--target=ok={url}",
+            f"--target=broken={url}/missing",
+            "--path=/",
+            "--concurrency=2",
+            "--duration=0.2",
+            stdout=out,
+        )
+        rows = {line.split()[0]: line.split() for line in out.getvalue().splitlines()}
+        self.assertGreater(int(rows["ok"][1]), 0)
+        self.assertEqual(rows["ok"][-1], "0")
+        self.assertEqual(rows["broken"][1], "0")
+        self.assertGreater(int(rows["broken"][-1]), 0)
+
+
+async def failing_responder(person, message, passages, history):
+    yield "첫"
+    raise RuntimeError("model unavailable")
+
+
+async def history_responder(person, message, passages, history):
+    yield f"{len(history.turns)}|{history.summary}"
+
+
+@override_settings(CHAT_STUB_DELAY=0)
+class ChatStreamingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # ASCII slug: AsyncClient decodes non-ASCII paths as Latin-1
+        self.person = Person.objects.create(name="Heo Jun", chat_enabled=True)
+        self.url = reverse("bio_chat", args=[self.person.slug])
+
+    async def post_events(self, message):
+        response = await self.async_client.post(self.url, {"message": message})
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        events = []
+        for block in body.decode().strip().split("\n\n"):
+            event, data = block.split("\n")
+            events.append((event.removeprefix("event: "), json.loads(data[6:])))
+        return events
+
+    async def test_reply_is_streamed_token_by_token(self):
+        events = await self.post_events("동의보감")
+        self.assertEqual(events[-1], ("done", {}))
+        tokens = [data["text"] for event, data in events if event == "token"]
+        self.assertGreater(len(tokens), 1)
+        self.assertEqual("".join(tokens), "Heo Jun: “동의보감”에 대해 이야기해 볼까요?")
+
+    @override_settings(CHAT_RESPONDER="bio.tests.failing_responder")
+    async def test_responder_errors_end_the_stream(self):
+        with self.assertLogs("bio.chat", "ERROR"):
+            events = await self.post_events("안녕")
+        self.assertEqual(events[0], ("token", {"text": "첫"}))
+        self.assertEqual(events[-1][0], "error")
+
+    def test_empty_message(self):
+        response = self.client.post(self.url, {"message": "  "})
+        self.assertEqual(response.status_code, 400)
+
+    def test_chat_page(self):
+        self.assertContains(self.client.get(self.url), "chat-form")
+
+
+@override_settings(CHAT_HISTORY_TURNS=4, CHAT_STUB_DELAY=0)
+class ChatSessionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.person = Person.objects.create(name="Yi Sun-sin", chat_enabled=True)
+        self.session = ChatSession.objects.create(person=self.person)
+
+    def add_turns(self, count, text="메시지 {}"):
+        for i in range(count):
+            role = "user" if i % 2 == 0 else "assistant"
+            self.session.add_turn(role, text.format(i))
+
+    def test_old_turns_are_folded_into_the_summary(self):
+        self.add_turns(10)
+        recent = self.session.recent_turns()
+        self.assertEqual(
+            [t.text for t in recent], [f"메시지 {i}" for i in range(6, 10)]
+        )
+        self.assertEqual(
+            self.session.summary.splitlines(),
+            [f"{'사용자' if i % 2 == 0 else '인물'}: 메시지 {i}" for i in range(6)],
+        )
+        self.assertEqual(self.session.summarized_until, recent[0].pk - 1)
+        # Every turn is kept for the history page
+        self.assertEqual(self.session.turns.count(), 10)
+
+    @override_settings(CHAT_SUMMARY_LENGTH=300)
+    def test_summary_is_capped(self):
+        self.add_turns(40, "아주 긴 메시지 {} " + "가" * 200)
+        self.assertLessEqual(len(self.session.summary), 300)
+        self.assertIn("메시지 35", self.session.summary)
+        self.assertNotIn("메시지 0 ", self.session.summary)
+
+    def test_add_turn_cost_does_not_grow(self):
+        self.add_turns(5)
+        with CaptureQueriesContext(connection) as early:
+            self.session.add_turn("user", "다섯")
+        self.add_turns(50)
+        with self.assertNumQueries(len(early)):
+            self.session.add_turn("user", "쉰다섯")
+
+    def test_turn_pages(self):
+        self.add_turns(5)
+        turns, cursor = self.session.turn_page(limit=2)
+        self.assertEqual([t.text for t in turns], ["메시지 3", "메시지 4"])
+        turns, cursor = self.session.turn_page(before=cursor, limit=2)
+        self.assertEqual([t.text for t in turns], ["메시지 1", "메시지 2"])
+        turns, cursor = self.session.turn_page(before=cursor, limit=2)
+        self.assertEqual([t.text for t in turns], ["메시지 0"])
+        self.assertIsNone(cursor)
+
+    async def post(self, message):
+        response = await self.async_client.post(
+            reverse("bio_chat", args=[self.person.slug]), {"message": message}
+        )
+        return b"".join([chunk async for chunk in response.streaming_content])
+
+    @override_settings(CHAT_RESPONDER="bio.tests.history_responder")
+    async def test_conversation_is_stored_in_the_visitor_session(self):
+        await self.post("first")
+        body = await self.post("second")
+        # The responder sees the window, ending with the new message
+        self.assertIn('"3|"', body.decode())
+        for i in range(3):
+            body = await self.post(f"more {i}")
+        self.assertIn('"4|사용자: first', body.decode())
+        session = await ChatSession.objects.exclude(pk=self.session.pk).aget()
+        self.assertEqual(await session.turns.acount(), 10)
+        self.assertEqual(await ChatTurn.objects.filter(role="assistant").acount(), 5)
+
+        response = await self.async_client.get(
+            reverse("bio_chat", args=[self.person.slug])
+        )
+        self.assertContains(response, "more 2")
+
+    async def test_history_fragment(self):
+        await self.post("hello there")
+        url = reverse("chat_history", args=[self.person.slug])
+        response = await self.async_client.get(url)
+        self.assertContains(response, "hello there")
+        response = await self.async_client.get(url, {"before": "1"})
+        self.assertNotContains(response, "hello there")
+
+    async def test_history_is_per_visitor(self):
+        await self.post("private")
+        self.async_client.cookies.clear()
+        response = await self.async_client.get(
+            reverse("bio_chat", args=[self.person.slug])
+        )
+        self.assertNotContains(response, "private")
+
+    def test_prune_command(self):
+        stale = ChatSession.objects.create(person=self.person)
+        stale.add_turn("user", "오래된")
+        ChatSession.objects.filter(pk=stale.pk).update(
+            updated_at=timezone.now() - timedelta(days=31)
+        )
+        self.session.add_turn("user", "최근")
+        out = StringIO()
+        call_command("prune_chat_sessions", stdout=out)
+        self.assertIn("Pruned 1 chat sessions", out.getvalue())
+        self.assertEqual(list(ChatSession.objects.all()), [self.session])
+        self.assertEqual(ChatTurn.objects.count(), 1)
+
+
+class ChatPassageTests(TestCase):
+    def setUp(self):
+        self.person = Person.objects.create(
+            name="허준",
+            biography="허준은 조선의 의관이다. 선조의 어의로 일했다.",
+        )
+        self.event = LifeEvent.objects.create(
+            person=self.person,
+            title="동의보감 완성",
+            description="광해군 때 동의보감 25권을 완성하였다.",
+            event_date="1610-08-06",
+        )
+        Evidence.objects.create(
+            life_event=self.event,
+            evidence_type="text",
+            text_content="내경편, 외형편, 잡병편, 탕액편, 침구편으로 이루어져 있다.",
+        )
+        self.other = Person.objects.create(
+            name="유의태", biography="동의보감과 무관한 가상의 스승이다."
+        )
+        index_people([self.person.pk, self.other.pk])
+
+    def texts(self, message, person=None):
+        return [p.text for p in retrieve_passages(person or self.person, message)]
+
+    def test_split_passages_keeps_sentences(self):
+        text = "가나다. " * 200
+        passages = split_passages(text, length=100)
+        self.assertGreater(len(passages), 1)
+        for passage in passages:
+            self.assertLessEqual(len(passage), 100)
+            self.assertTrue(passage.endswith("가나다."))
+
+    def test_passages_cover_biography_events_and_evidence(self):
+        sources = list(self.person.chat_passages.values_list("source", flat=True))
+        self.assertEqual(sources, ["biography", "event", "evidence"])
+
+    def test_retrieval_ranks_matching_passages(self):
+        texts = self.texts("탕액편 이야기")
+        self.assertEqual(len(texts), 1)
+        self.assertIn("탕액편", texts[0])
+        self.assertIn("동의보감", self.texts("동의보감은 언제 썼나요?")[0])
+
+    def test_retrieval_is_limited_to_the_person(self):
+        self.assertEqual(self.texts("가상의 스승"), [])
+        self.assertEqual(len(self.texts("동의보감", self.other)), 1)
+
+    def test_without_terms_returns_the_opening_passages(self):
+        self.assertEqual(self.texts("네")[0], self.person.biography)
+
+    def test_event_changes_reindex(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.description = "구암 허준이 편찬하였다."
+            self.event.save()
+        self.assertIn("편찬하였다", self.texts("편찬하였다")[0])
+        self.assertEqual(self.texts("25권을"), [])
+
+    def test_import_updates_only_loaded_people(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump({"name": "장영실", "biography": "자격루를 만든 과학자이다."}, f)
+        self.addCleanup(os.unlink, f.name)
+        other_passages = list(self.other.chat_passages.values_list("pk", flat=True))
+        call_command("load_result_data", file=f.name, stdout=StringIO())
+        person = Person.objects.get(name="장영실")
+        self.assertIn("자격루", self.texts("자격루", person)[0])
+        self.assertEqual(
+            list(self.other.chat_passages.values_list("pk", flat=True)),
+            other_passages,
+        )
+
+    def test_import_deletes_do_not_reindex_per_row(self):
+        """Test that events dropped by --update do not each trigger receivers."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "person.json")
+            data = {"name": "허준", "biography": "의관", "life_events": []}
+            events = [
+                LifeEvent(
+                    person=self.person,
+                    title=f"사건 {i}",
+                    description="설명",
+                    event_date="1600-01-01",
+                )
+                for i in range(50)
+            ]
+            LifeEvent.objects.bulk_create(events)
+            Evidence.objects.bulk_create(
+                Evidence(life_event=event, evidence_type="text", text_content="기록")
+                for event in events
+            )
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            with (
+                patch(
+                    "bio.management.commands.load_result_data.index_people",
+                    wraps=index_people,
+                ) as mock_index,
+                self.captureOnCommitCallbacks() as callbacks,
+                CaptureQueriesContext(connection) as queries,
+            ):
+                call_command(
+                    "load_result_data", "--update", file=path, stdout=StringIO()
+                )
+        self.assertFalse(self.person.life_events.exists())
+        self.assertEqual(callbacks, [])
+        self.assertEqual(mock_index.call_count, 1)
+        touches = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "bio_person" SET "updated_at"')
+        ]
+        self.assertEqual(len(touches), 1)
+        self.assertLess(len(queries), 40)
+
+    def test_rebuild_command(self):
+        ChatPassage.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_chat_index", stdout=out)
+        self.assertIn("Indexed 4 passages for 2 people", out.getvalue())
+        self.assertEqual(len(self.texts("탕액편")), 1)
+
+    @override_settings(CHAT_STUB_DELAY=0)
+    async def test_stub_reply_quotes_best_passage(self):
+        events = [event async for event in chat.stream_reply(self.person, "탕액편")]
+        self.assertIn("탕액편", "".join(events))
+
+
+@override_settings(RATE_LIMITS={"chat": (2, 60), "comment": (2, 60)})
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().post("/", REMOTE_ADDR="10.0.0.1")
+
+    def test_bucket_refills_over_time(self):
+        self.assertEqual(take_token(self.request, "chat"), 0)
+        self.assertEqual(take_token(self.request, "chat"), 0)
+        self.assertAlmostEqual(take_token(self.request, "chat"), 30, delta=1)
+        with patch("bio.ratelimit.time.time", return_value=time.time() + 30):
+            self.assertEqual(take_token(self.request, "chat"), 0)
+        # Other endpoints and clients have their own buckets
+        self.assertEqual(take_token(self.request, "comment"), 0)
+        other = RequestFactory().post("/", REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(take_token(other, "chat"), 0)
+
+    @override_settings(RATE_LIMIT_IP_HEADER="HTTP_X_FORWARDED_FOR")
+    def test_client_ip_header(self):
+        for _ in range(2):
+            take_token(self.request, "chat")
+        proxied = RequestFactory().post(
+            "/", REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="203.0.113.5, 10.0.0.1"
+        )
+        self.assertEqual(take_token(proxied, "chat"), 0)
+
+    def test_chat_answers_429_with_retry_after(self):
+        person = Person.objects.create(name="Jang Yeong-sil", chat_enabled=True)
+        url = reverse("bio_chat", args=[person.slug])
+        for _ in range(2):
+            self.assertEqual(self.client.post(url, {"message": ""}).status_code, 400)
+        response = self.client.post(url, {"message": ""})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "30")
+        # Reading the page is not limited
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(RATE_LIMITS={"comment": (1, 60)})
+    def test_comments_are_limited(self):
+        person = Person.objects.create(name="정약용")
+        url = reverse("add_comment", args=[person.slug])
+        data = {"user_name": "tester", "comment": "hello"}
+        self.assertEqual(self.client.post(url, data).status_code, 200)
+        self.assertEqual(self.client.post(url, data).status_code, 429)
+        self.assertEqual(Comment.objects.count(), 1)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.hong = Person.objects.create(
+            name="홍길동", biography="조선 시대의 의적. 탐관오리의 재물을 빼앗았다."
+        )
+        self.yi = Person.objects.create(
+            name="이순신", biography="조선 중기의 무신. 홍길동 이야기를 좋아했다."
+        )
+
+    def search(self, q):
+        return search_people(q)[0]
+
+    def test_search_matches_korean_substrings(self):
+        """Test that the trigram index matches text inside longer words."""
+        self.assertEqual(self.search("탐관오리"), [self.hong])
+        self.assertEqual(self.search("중기의 무신"), [self.yi])
+
+    def test_name_matches_rank_first(self):
+        """Test that a name match outranks a biography match."""
+        self.assertEqual(self.search("홍길동"), [self.hong, self.yi])
+
+    def test_index_follows_updates_and_deletes(self):
+        """Test that saving and deleting people keeps the index in sync."""
+        self.hong.biography = "전설 속의 인물"
+        self.hong.save()
+        self.assertEqual(self.search("탐관오리"), [])
+        self.assertEqual(self.search("전설 속의"), [self.hong])
+
+        self.yi.delete()
+        self.assertEqual(self.search("홍길동"), [self.hong])
+
+    def test_short_terms_fall_back_to_icontains(self):
+        """Test that terms shorter than a trigram still find matches."""
+        self.assertEqual(self.search("길동"), [self.hong, self.yi])
+
+    def test_fts_operators_are_matched_literally(self):
+        """Test that user input cannot inject FTS5 query syntax."""
+        self.assertEqual(self.search('홍길동" OR "무신'), [])
+
+    def test_rebuild_command_restores_index(self):
+        """Test that the rebuild command repopulates an emptied index."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO bio_person_fts(bio_person_fts) VALUES ('delete-all')"
+            )
+        self.assertEqual(self.search("탐관오리"), [])
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(self.search("탐관오리"), [self.hong])
+
+    def test_search_continues_after_cursor(self):
+        """Test that the cursor resumes ranked results after the last one."""
+        results, cursor = search_people("홍길동", limit=1)
+        self.assertEqual(results, [self.hong])
+        results, cursor = search_people("홍길동", after=cursor, limit=1)
+        self.assertEqual(results, [self.yi])
+        self.assertIsNone(cursor)
+
+    def test_fallback_search_continues_after_cursor(self):
+        """Test that icontains results are paged by primary key."""
+        results, cursor = search_people("길동", limit=1)
+        self.assertEqual(results, [self.hong])
+        self.assertEqual(
+            search_people("길동", after=cursor, limit=1), ([self.yi], None)
+        )
+
+    @patch("bio.views.PAGE_SIZE", 1)
+    def test_explore_loads_more_results_with_htmx(self):
+        """Test that explore links to the next page and serves it as a fragment."""
+        response = self.client.get(reverse("explore"), {"q": "홍길동"})
+        self.assertEqual(response.context["people"], [self.hong])
+        more_url = response.context["more_url"]
+
+        response = self.client.get(more_url, headers={"HX-Request": "true"})
+        self.assertTemplateUsed(response, "_person_cards.html")
+        self.assertTemplateNotUsed(response, "explore.html")
+        self.assertEqual(response.context["people"], [self.yi])
+        self.assertNotIn("more_url", response.context)
+
+    def test_cards_load_a_truncated_biography(self):
+        """Test that cards defer the full biography and get a short snippet."""
+        self.hong.biography = "가" * 500
+        self.hong.save()
+        person = Person.objects.for_cards().get(pk=self.hong.pk)
+        self.assertIn("biography", person.get_deferred_fields())
+        self.assertEqual(len(person.bio_snippet), 161)
+
+
+class LoadResultDataTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def person(self, name, events=1):
+        return {
+            "name": name,
+            "biography": f"About {name}",
+            "occupation": ["writer", "actor"],
+            "life_events": [
+                {
+                    "title": f"Event {i}",
+                    "description": "Something happened",
+                    "event_date": f"20{10 + i}-01-01",
+                }
+                for i in range(events)
+            ],
+        }
+
+    def write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def load(self, path, *args):
+        call_command("load_result_data", f"--file={path}", *args, stdout=StringIO())
+
+    def test_loads_single_person_object(self):
+        """Test that the original one-person file format still loads."""
+        self.load(self.write("result.json", json.dumps(self.person("Alice", 2))))
+        alice = Person.objects.get(name="Alice")
+        self.assertEqual(alice.occupation, "writer,actor")
+        self.assertEqual(alice.life_events.count(), 2)
+
+    def test_loads_json_lines_in_batches(self):
+        """Test that JSON Lines files are written in batches of persons."""
+        lines = "\n".join(json.dumps(self.person(f"P{i}")) for i in range(5))
+        path = self.write("people.jsonl", lines + "\n\n")
+        with patch.object(
+            load_result_data.Command,
+            "write_batch",
+            autospec=True,
+            side_effect=load_result_data.Command.write_batch,
+        ) as write_batch:
+            self.load(path, "--batch-size=2")
+        self.assertEqual(write_batch.call_count, 3)
+        self.assertEqual(Person.objects.count(), 5)
+        self.assertEqual(LifeEvent.objects.count(), 5)
+
+    def test_streams_json_array(self):
+        """Test that array elements are parsed across read chunks."""
+        people = [self.person(f"P{i}", events=3) for i in range(20)]
+        path = self.write("people.json", json.dumps(people, indent=2))
+        with open(path, encoding="utf-8") as f:
+            parsed = list(iter_json_array(f, chunk_size=7))
+        self.assertEqual(parsed, people)
+
+        self.load(path)
+        self.assertEqual(Person.objects.count(), 20)
+
+    def test_duplicate_names_get_unique_slugs(self):
+        """Test that bulk-created people get slugs like Person.save() does."""
+        Person.objects.create(name="Same Name")
+        people = [self.person("Same Name"), self.person("Same-Name")]
+        self.load(self.write("people.json", json.dumps(people)))
+        self.assertEqual(
+            sorted(Person.objects.values_list("slug", flat=True)),
+            ["same-name", "same-name-2"],
+        )
+
+    def test_update_replaces_events_of_existing_person(self):
+        """Test that --update rewrites fields and life events."""
+        path = self.write("result.json", json.dumps(self.person("Alice", 3)))
+        self.load(path)
+        updated = self.person("Alice", 1)
+        updated["biography"] = "Rewritten"
+        self.load(self.write("result.json", json.dumps(updated)), "--update")
+
+        alice = Person.objects.get(name="Alice")
+        self.assertEqual(alice.biography, "Rewritten")
+        self.assertEqual(alice.life_events.count(), 1)
+
+    def test_update_diffs_events_and_keeps_evidences(self):
+        """Test that --update only touches events that changed."""
+        original = self.person("Alice", 3)
+        self.load(self.write("result.json", json.dumps(original)))
+        kept = LifeEvent.objects.get(title="Event 0")
+        Evidence.objects.create(life_event=kept, evidence_type="text", text_content="x")
+
+        changed = self.person("Alice", 3)
+        changed["life_events"][1]["description"] = "Rewritten"
+        del changed["life_events"][2]
+        changed["life_events"].append(
+            {"title": "New", "description": "Added", "event_date": "2020-05-05"}
+        )
+        out = StringIO()
+        call_command(
+            "load_result_data",
+            f"--file={self.write('result.json', json.dumps(changed))}",
+            "--update",
+            stdout=out,
+        )
+
+        self.assertIn("1 created, 1 updated, 1 deleted", out.getvalue())
+        self.assertEqual(
+            sorted(LifeEvent.objects.values_list("title", flat=True)),
+            ["Event 0", "Event 1", "New"],
+        )
+        self.assertEqual(kept.evidences.count(), 1)
+        self.assertEqual(
+            LifeEvent.objects.get(title="Event 1").description, "Rewritten"
+        )
+
+    def test_update_skips_unchanged_documents(self):
+        """Test that re-importing the same document writes nothing."""
+        path = self.write("result.json", json.dumps(self.person("Alice", 3)))
+        self.load(path, "--update")
+        with CaptureQueriesContext(connection) as queries:
+            self.load(path, "--update")
+        writes = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+        ]
+        self.assertEqual(writes, [])
+
+    def test_records_without_name_are_skipped(self):
+        """Test that invalid records are reported without stopping the load."""
+        lines = [json.dumps({"biography": "nameless"}), json.dumps(self.person("Bob"))]
+        self.load(self.write("people.jsonl", "\n".join(lines)))
+        self.assertEqual(list(Person.objects.values_list("name", flat=True)), ["Bob"])
+
+    def test_loads_directory_with_worker_processes(self):
+        """Test that files parsed in a process pool are all written."""
+        os.mkdir(os.path.join(self.tmpdir.name, "nested"))
+        for i in range(4):
+            self.write(f"nested/p{i}.json", json.dumps(self.person(f"P{i}")))
+        self.write("empty.jsonl", "\n")
+        self.write("broken.json", "{not json")
+        self.write("notes.txt", "ignored")
+
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, "1 file(s) could not be loaded"):
+            call_command(
+                "load_result_data", f"--path={self.tmpdir.name}", "--jobs=2", stdout=out
+            )
+        self.assertEqual(Person.objects.count(), 4)
+        self.assertIn(
+            "Files: 4 processed, 0 partially loaded, 1 skipped, 1 failed",
+            out.getvalue(),
+        )
+
+    def test_broken_file_is_partially_loaded_in_both_modes(self):
+        """Test that records before a JSON error are kept with and without --jobs."""
+        self.write("a.jsonl", json.dumps(self.person("A")))
+        people = json.dumps([self.person("B"), self.person("C")])
+        self.write("b.json", people[: people.index('{"name": "C"') + 10])
+        for jobs in ("--jobs=1", "--jobs=2"):
+            Person.objects.all().delete()
+            out = StringIO()
+            with self.assertRaisesMessage(CommandError, "1 only partially"):
+                call_command(
+                    "load_result_data", f"--path={self.tmpdir.name}", jobs, stdout=out
+                )
+            self.assertEqual(
+                sorted(Person.objects.values_list("name", flat=True)), ["A", "B"]
+            )
+            self.assertIn("partially loaded: 1 records", out.getvalue())
+            self.assertIn("Files: 1 processed, 1 partially loaded", out.getvalue())
+
+    def test_invalid_person_fields_fail_only_that_record(self):
+        """Test that a bad date or type fails one record, not its whole batch."""
+        bad_date = {**self.person("Bad date"), "birth_date": "1990"}
+        bad_type = {**self.person("Bad type"), "nationality": ["KR"]}
+        nullable = {**self.person("Nulls"), "biography": None, "death_date": None}
+        self.write("a.json", json.dumps([self.person("A"), bad_date, nullable]))
+        self.write("b.json", json.dumps([bad_type, self.person("B")]))
+        for jobs in ("--jobs=1", "--jobs=2"):
+            Person.objects.all().delete()
+            out = StringIO()
+            call_command(
+                "load_result_data", f"--path={self.tmpdir.name}", jobs, stdout=out
+            )
+            self.assertEqual(
+                sorted(Person.objects.values_list("name", flat=True)),
+                ["A", "B", "Nulls"],
+            )
+            self.assertEqual(Person.objects.get(name="Nulls").biography, "")
+            self.assertIn("Invalid birth_date: '1990'", out.getvalue())
+            self.assertIn("Invalid nationality", out.getvalue())
+            self.assertIn("2 failed)", out.getvalue())
+
+    def test_loads_glob_pattern(self):
+        """Test that --path accepts glob patterns."""
+        self.write("a.json", json.dumps(self.person("A")))
+        self.write("b.json", json.dumps(self.person("B")))
+        self.write("c.jsonl", json.dumps(self.person("C")))
+        pattern = os.path.join(self.tmpdir.name, "*.json")
+        call_command("load_result_data", f"--path={pattern}", stdout=StringIO())
+        self.assertEqual(
+            sorted(Person.objects.values_list("name", flat=True)), ["A", "B"]
+        )
@@ -0,0 +1,101 @@
+"""
+Resized WebP/JPEG derivatives of uploaded images.
+
+Derivatives are generated with Pillow the first time they are asked for and
+stored next to the uploads as ``MEDIA_ROOT/thumbs/<size>/<upload path>.<ext>``,
+so later requests only check that the file exists. A derivative older than its
+source (the upload was replaced) is regenerated.
+
+Templates use the ``srcset`` and ``thumbnail_url`` tags from
+``bio.templatetags.thumbnails``.
+"""
+
+import logging
+import os
+import tempfile
+
+from django.conf import settings
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_DIR = "thumbs"
+
+FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+
+
+def _quality():
+    return getattr(settings, "THUMBNAIL_QUALITY", 80)
+
+
+def thumbnail_name(name, width, format="jpeg", crop=False):
+    """Return the storage name of the ``width`` pixel derivative of ``name``."""
+    size = f"{width}x{width}" if crop else str(width)
+    return f"{THUMBNAIL_DIR}/{size}/{os.path.splitext(name)[0]}.{format}"
+
+
+def _resize(image, width, crop):
+    image = ImageOps.exif_transpose(image)
+    if crop:
+        # Square, centered; matches the object-cover avatars
+        side = min(width, image.width, image.height)
+        return ImageOps.fit(image, (side, side), Image.Resampling.LANCZOS)
+    if image.width > width:
+        height = max(round(image.height * width / image.width), 1)
+        image = image.resize((width, height), Image.Resampling.LANCZOS)
+    return image
+
+
+def _save(image, path, format):
+    if format == "jpeg" and image.mode != "RGB":
+        # JPEG has no alpha channel; flatten transparent images onto white
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    elif format == "webp" and image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write to a temporary file first so concurrent requests never serve a
+    # partly written derivative.
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            image.save(f, FORMATS[format], quality=_quality(), optimize=True)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def get_thumbnail(field_file, width, format="jpeg", crop=False):
+    """
+    Return the URL of a ``width`` pixel wide ``format`` version of
+    ``field_file``, generating it if needed.
+
+    Falls back to the original URL when the storage has no local paths or the
+    image cannot be read.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unsupported thumbnail format: {format}")
+    storage = field_file.storage
+    name = thumbnail_name(field_file.name, width, format, crop)
+    try:
+        source_path = field_file.path
+        path = storage.path(name)
+    except NotImplementedError:
+        return field_file.url
+
+    try:
+        fresh = os.path.getmtime(path) >= os.path.getmtime(source_path)
+    except FileNotFoundError:
+        fresh = False
+    if not fresh:
+        try:
+            with Image.open(source_path) as image:
+                _save(_resize(image, width, crop), path, format)
+        except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+            logger.warning("Cannot create thumbnail of %s", field_file.name)
+            return field_file.url
+    return storage.url(name)
@@ -0,0 +1,83 @@
+"""
+Cached trending leaderboards.
+
+Each period's top ``TRENDING_LIMIT`` people are computed from the click rollups
+and kept in Django's cache for ``TRENDING_CACHE_TTL`` seconds. Once an entry
+goes stale a single caller recomputes it while everyone else keeps serving the
+stale leaderboard.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+
+from .clicks import hour_bucket
+from .models import ClickRollup
+
+PERIODS = {
+    "day": timedelta(days=1),
+    "week": timedelta(days=7),
+    "month": timedelta(days=30),
+    "all": None,
+}
+
+# Stale entries are kept this many TTLs so they can be served during a rebuild.
+STALE_FACTOR = 10
+
+
+def _ttl():
+    return getattr(settings, "TRENDING_CACHE_TTL", 300)
+
+
+def _limit():
+    return getattr(settings, "TRENDING_LIMIT", 50)
+
+
+def _cache_key(period):
+    return f"bio:trending:{period}"
+
+
+def compute_leaderboard(period, limit=None):
+    """Return ``(person_pk, click_count)`` pairs for ``period``, busiest first."""
+    rollups = ClickRollup.objects.all()
+    window = PERIODS[period]
+    if window is not None:
+        rollups = rollups.filter(bucket__gte=hour_bucket(timezone.now() - window))
+
+    rows = (
+        rollups.values("person")
+        .annotate(click_count=Sum("count"))
+        .order_by("-click_count", "person")
+    )
+    return [(row["person"], row["click_count"]) for row in rows[: limit or _limit()]]
+
+
+def get_leaderboard(period):
+    """Return the cached leaderboard for ``period``, recomputing it if stale."""
+    key = _cache_key(period)
+    ttl = _ttl()
+    entry = cache.get(key)
+    if entry is not None and entry["expires_at"] > time.time():
+        return entry["rows"]
+
+    # Only the caller that wins the lock recomputes; the rest serve stale data.
+    lock_key = f"{key}:lock"
+    if not cache.add(lock_key, True, timeout=ttl):
+        if entry is not None:
+            return entry["rows"]
+        return compute_leaderboard(period)
+
+    try:
+        rows = compute_leaderboard(period)
+        cache.set(
+            key,
+            {"rows": rows, "expires_at": time.time() + ttl},
+            timeout=ttl * STALE_FACTOR,
+        )
+    finally:
+        cache.delete(lock_key)
+    return rows
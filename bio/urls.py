@@ -4,5 +4,7 @@ from . import views
 urlpatterns = [
     path("<slug>/", views.bio_detail, name="bio_detail"),
     path("<slug>/chat/", views.bio_chat, name="bio_chat"),
+    path("<slug>/chat/history/", views.chat_history, name="chat_history"),
     path("<slug>/comment/", views.add_comment, name="add_comment"),
+    path("<slug>/comments/", views.comment_list, name="comment_list"),
 ]
@@ -0,0 +1,181 @@
+"""
+Metadata and poster frames for uploaded evidence videos.
+
+Duration and dimensions are read from the MP4/MOV box structure in pure
+Python: only the box headers and the small ``moov`` boxes are read, never the
+media data. Poster frames come from the function named by
+``VIDEO_POSTER_EXTRACTOR``, called as ``extractor(path, duration)`` and
+returning JPEG bytes or ``None``. The default uses a local ``ffmpeg`` binary
+when one is installed; set the setting to ``None`` to skip posters.
+"""
+
+import logging
+import shutil
+import struct
+import subprocess
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Boxes whose payload is a list of child boxes on the way to tkhd/hdlr/mvhd.
+CONTAINER_BOXES = {b"moov", b"trak", b"mdia"}
+
+# Boxes larger than this are skipped rather than read into memory.
+MAX_BOX_SIZE = 16 * 1024 * 1024
+
+POSTER_TIMEOUT = 30  # seconds
+
+
+def _iter_boxes(f, end):
+    """Yield ``(type, payload_start, payload_end)`` for boxes up to ``end``."""
+    while end is None or f.tell() + 8 <= end:
+        start = f.tell()
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack(">I4s", header)
+        if size == 1:
+            (size,) = struct.unpack(">Q", f.read(8))
+        elif size == 0:
+            # Extends to the end of the enclosing box or file
+            if end is None:
+                f.seek(0, 2)
+                size = f.tell() - start
+            else:
+                size = end - start
+        payload_start = f.tell()
+        box_end = start + size
+        if size < 8 or (end is not None and box_end > end):
+            raise ValueError("Corrupt MP4 box")
+        yield box_type, payload_start, box_end
+        f.seek(box_end)
+
+
+def _read_box(f, start, end):
+    if end - start > MAX_BOX_SIZE:
+        raise ValueError("MP4 box too large")
+    f.seek(start)
+    return f.read(end - start)
+
+
+def _parse_mvhd(data):
+    version = data[0]
+    if version == 1:
+        timescale, duration = struct.unpack_from(">IQ", data, 20)
+        unknown = duration == 0xFFFFFFFFFFFFFFFF
+    else:
+        timescale, duration = struct.unpack_from(">II", data, 12)
+        unknown = duration == 0xFFFFFFFF
+    if not timescale or unknown:
+        return None
+    return duration / timescale
+
+
+def _parse_tkhd(data):
+    offset = 4 + (32 if data[0] == 1 else 20)
+    # reserved(8) layer(2) alternate_group(2) volume(2) reserved(2)
+    offset += 16
+    a, b = struct.unpack_from(">ii", data, offset)
+    width, height = struct.unpack_from(">II", data, offset + 36)
+    width, height = width >> 16, height >> 16
+    if a == 0 and abs(b) == 0x10000:
+        # Rotated by 90 or 270 degrees (portrait phone video)
+        width, height = height, width
+    return width, height
+
+
+def _parse_hdlr(data):
+    return data[8:12]
+
+
+def read_mp4_metadata(f):
+    """
+    Return ``{"duration", "width", "height"}`` for the MP4 file object ``f``.
+
+    Values that cannot be found are ``None``. Raises ``ValueError`` if the
+    file is not a valid MP4/MOV file.
+    """
+    metadata = {"duration": None, "width": None, "height": None}
+    found_moov = False
+
+    def walk(end, track):
+        nonlocal found_moov
+        for box_type, start, box_end in _iter_boxes(f, end):
+            if box_type in CONTAINER_BOXES:
+                found_moov = found_moov or box_type == b"moov"
+                child_track = {} if box_type == b"trak" else track
+                walk(box_end, child_track)
+                if box_type == b"trak" and child_track.get("handler") == b"vide":
+                    if metadata["width"] is None and child_track.get("size"):
+                        metadata["width"], metadata["height"] = child_track["size"]
+            elif box_type == b"mvhd":
+                metadata["duration"] = _parse_mvhd(_read_box(f, start, box_end))
+            elif box_type == b"tkhd" and track is not None:
+                track["size"] = _parse_tkhd(_read_box(f, start, box_end))
+            elif box_type == b"hdlr" and track is not None:
+                track["handler"] = _parse_hdlr(_read_box(f, start, box_end))
+            f.seek(box_end)
+
+    f.seek(0)
+    try:
+        walk(None, None)
+    except struct.error:
+        raise ValueError("Truncated MP4 box")
+    if not found_moov:
+        raise ValueError("No moov box found")
+    return metadata
+
+
+def ffmpeg_poster(path, duration):
+    """Grab a JPEG frame one second in (or halfway, for short clips)."""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        return None
+    position = min(1.0, duration / 2) if duration else 0
+    # fmt: off
+    command = [
+        ffmpeg, "-v", "error", "-ss", f"{position:.3f}", "-i", path,
+        "-frames:v", "1", "-f", "image2pipe", "-vcodec", "mjpeg", "-",
+    ]
+    # fmt: on
+    try:
+        result = subprocess.run(
+            command, capture_output=True, timeout=POSTER_TIMEOUT, check=True
+        )
+    except (OSError, subprocess.SubprocessError):
+        logger.warning("ffmpeg could not extract a poster from %s", path)
+        return None
+    return result.stdout or None
+
+
+def get_poster_extractor():
+    path = getattr(settings, "VIDEO_POSTER_EXTRACTOR", "bio.video.ffmpeg_poster")
+    return import_string(path) if path else None
+
+
+def extract_video_metadata(field_file):
+    """
+    Return ``(metadata, poster_bytes)`` for an uploaded video file.
+
+    ``metadata`` is empty if the file is not an MP4/MOV file; ``poster_bytes``
+    is ``None`` if no poster could be made.
+    """
+    try:
+        with field_file.open("rb") as f:
+            metadata = read_mp4_metadata(f)
+    except (OSError, ValueError) as e:
+        logger.warning("Cannot read video metadata of %s: %s", field_file.name, e)
+        metadata = {}
+
+    poster = None
+    extractor = get_poster_extractor()
+    if extractor is not None:
+        try:
+            path = field_file.path
+        except NotImplementedError:
+            path = None
+        if path:
+            poster = extractor(path, metadata.get("duration"))
+    return metadata, poster
@@ -1,35 +1,124 @@
-from django.shortcuts import render, get_object_or_404
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, aget_object_or_404, get_object_or_404
 from django.http import JsonResponse
-from .models import Person, PersonClick
+from .models import ChangeMarker, ChatSession, ImportJob, Person
+from .chat import stream_reply
+from .clicks import record_click
+from .fragments import render_event_list
+from .jobs import enqueue_import
+from .ratelimit import is_bot, rate_limit, take_token
+from .search import search_people
+from .trending import PERIODS, get_leaderboard
 from comment.models import Comment
 from django.contrib.contenttypes.models import ContentType
-from django.http import HttpResponse
-from django.utils import timezone
-from datetime import timedelta
-from django.db.models import Count, Case, When, IntegerField
-from django.db.models import Q
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import redirect
+from django.urls import reverse
 from django.contrib import messages
-from django.core.management import call_command
-import tempfile
-import os
+from django.middleware.csrf import get_token
+from django.db.models import Max
+from django.utils import translation
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from datetime import MAXYEAR, MINYEAR, date
+from urllib.parse import urlencode
+import hashlib
+
+PAGE_SIZE = 20
+COMMENT_PAGE_SIZE = 20
+CHAT_PAGE_SIZE = 20
+
+
+def _validators(request, last_modified, *version):
+    """
+    Return ``(etag, last_modified)`` for a page built from data last changed
+    at ``last_modified``.
+
+    The ETag also covers everything else the HTML depends on: the URL, the
+    language, htmx partial requests and the CSRF secret behind the form tokens.
+    """
+    # Make sure the CSRF secret exists now, so the first response (which sets
+    # the cookie) gets the same ETag as the revalidations that send it back.
+    get_token(request)
+    parts = [
+        *version,
+        last_modified.isoformat() if last_modified else "",
+        request.get_full_path(),
+        translation.get_language(),
+        request.headers.get("HX-Request", ""),
+        request.META["CSRF_COOKIE"],
+    ]
+    digest = hashlib.md5("|".join(map(str, parts)).encode(), usedforsecurity=False)
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return quote_etag(digest.hexdigest()), timestamp
+
+
+def _not_modified(request, etag, last_modified):
+    """Return a 304 response if the client's copy is current, else ``None``."""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        _add_validators(response, etag, last_modified)
+    return response
+
+
+def _add_validators(response, etag, last_modified):
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+    # Pages carry a per-visitor CSRF token and every view should reach us
+    # (bio_detail counts it), so caches must revalidate each time.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _people_validators(request):
+    # Any new, changed or deleted person changes the listing pages. Both are
+    # index lookups; deletions leave no updated_at behind, so they are marked.
+    changes = [
+        Person.objects.aggregate(last=Max("updated_at"))["last"],
+        ChangeMarker.objects.changed_at("people"),
+    ]
+    last_modified = max((change for change in changes if change), default=None)
+    return _validators(request, last_modified)
 
 
 def home(request):
+    etag, last_modified = _people_validators(request)
+    not_modified = _not_modified(request, etag, last_modified)
+    if not_modified:
+        return not_modified
+
     people = Person.objects.all()[:5]
-    return render(request, "home.html", {"people": people})
+    response = render(request, "home.html", {"people": people})
+    return _add_validators(response, etag, last_modified)
 
 
-def bio_detail(request, slug):
-    person = get_object_or_404(Person, slug=slug)
+def _first_comment_page(person):
+    return Comment.objects.for_object(person).thread_page(limit=COMMENT_PAGE_SIZE)
+
 
-    # Record the click
-    PersonClick.objects.create(person=person, viewed_at=timezone.now())
+async def bio_detail(request, slug):
+    person = await aget_object_or_404(Person, slug=slug)
 
-    all_events = person.life_events.all().order_by("event_date")
+    # Record the click, also for views answered with 304 Not Modified. Bots are
+    # not counted, and clients over their click limit still get the page.
+    if not is_bot(request) and not take_token(request, "click"):
+        await sync_to_async(record_click)(person)
 
-    # Get a unique, sorted list of years from the events
-    years = sorted(list(set(event.event_date.year for event in all_events)))
+    etag, last_modified = _validators(request, person.updated_at, person.pk)
+    not_modified = _not_modified(request, etag, last_modified)
+    if not_modified:
+        return not_modified
+
+    is_htmx = request.headers.get("HX-Request")
+
+    # Years with events, from a distinct query on the (person, event_date) index.
+    # Year switches from the timeline bar always carry a year, so skip it there.
+    years = []
+    if not (is_htmx and request.GET.get("year")):
+        years = [
+            day.year async for day in person.life_events.dates("event_date", "year")
+        ]
 
     # Determine the selected year
     try:
@@ -37,82 +126,100 @@ def bio_detail(request, slug):
     except (ValueError, TypeError):
         selected_year = years[0] if years else None
 
-    # Filter events for the selected year
-    life_events = (
-        all_events.filter(event_date__year=selected_year).prefetch_related("evidences")
-        if selected_year
-        else []
+    # Filter events for the selected year as a date range
+    life_events = []
+    if selected_year and MINYEAR <= selected_year < MAXYEAR:
+        life_events = (
+            person.life_events.filter(
+                event_date__gte=date(selected_year, 1, 1),
+                event_date__lt=date(selected_year + 1, 1, 1),
+            )
+            .order_by("event_date")
+            .prefetch_related("evidences")
+        )
+
+    # Cached HTML; the queryset is only evaluated when the fragment is missing
+    event_list = await sync_to_async(render_event_list)(
+        request, person, selected_year, life_events
     )
+    if is_htmx:
+        return _add_validators(HttpResponse(event_list), etag, last_modified)
 
-    # Get comments for this person
-    content_type = ContentType.objects.get_for_model(Person)
-    comments = Comment.objects.filter(
-        content_type=content_type, object_pk=person.pk, is_removed=False
-    ).order_by("-created_at")
+    # Get the first page of comment threads for this person
+    comments, comments_cursor = await sync_to_async(_first_comment_page)(person)
 
     context = {
         "person": person,
-        "life_events": life_events,
+        "event_list": event_list,
         "years": years,
         "selected_year": selected_year,
         "comments": comments,
+        "comments_more_url": _comments_more_url(person, comments_cursor),
     }
 
+    response = await sync_to_async(render)(request, "bio_detail.html", context)
+    return _add_validators(response, etag, last_modified)
+
+
+def _render_cards(request, template_name, context, more_params):
+    """Render a page of person cards, or just the cards for htmx "load more"."""
+    if context["next_cursor"]:
+        more_params = {**more_params, "after": context["next_cursor"]}
+        context["more_url"] = f"{request.path}?{urlencode(more_params)}"
     if request.headers.get("HX-Request"):
-        return render(request, "_event_list.html", context)
+        return render(request, "_person_cards.html", context)
+    return render(request, template_name, context)
 
-    return render(request, "bio_detail.html", context)
 
+async def explore(request):
+    etag, last_modified = await sync_to_async(_people_validators)(request)
+    not_modified = _not_modified(request, etag, last_modified)
+    if not_modified:
+        return not_modified
 
-def explore(request):
-    q = request.GET.get("q", "")
-    results = []
+    q = request.GET.get("q", "").strip()
+    results, next_cursor = [], None
     if q:
-        results = Person.objects.filter(
-            Q(name__icontains=q) | Q(biography__icontains=q)
+        results, next_cursor = await sync_to_async(search_people)(
+            q, after=request.GET.get("after"), limit=PAGE_SIZE
         )
-    return render(request, "explore.html", {"q": q, "results": results})
+
+    context = {"q": q, "people": results, "next_cursor": next_cursor}
+    response = await sync_to_async(_render_cards)(
+        request, "explore.html", context, {"q": q}
+    )
+    return _add_validators(response, etag, last_modified)
 
 
-def trending(request):
+async def trending(request):
     period = request.GET.get("period", "day")
-    end_date = timezone.now()
-    start_date = end_date
-
-    if period == "day":
-        start_date = end_date - timedelta(days=1)
-    elif period == "week":
-        start_date = end_date - timedelta(days=7)
-    elif period == "month":
-        start_date = end_date - timedelta(days=30)
-    # If period is 'all', no start_date filter is applied to PersonClick
-
-    if period == "all":
-        trending_people_query = (
-            PersonClick.objects.values("person")
-            .annotate(click_count=Count("id"))
-            .order_by("-click_count")
-        )
-    else:
-        trending_people_query = (
-            PersonClick.objects.filter(viewed_at__gte=start_date)
-            .values("person")
-            .annotate(click_count=Count("id"))
-            .order_by("-click_count")
-        )
+    if period not in PERIODS:
+        period = "day"
 
-    # Get the PIDs of trending people
-    trending_person_pks = [item["person"] for item in trending_people_query]
+    # Top-N (person pk, click count) pairs, served from the cache
+    leaderboard = [pk for pk, _ in await sync_to_async(get_leaderboard)(period)]
 
-    # Fetch the actual Person objects in the order of their trending status
-    preserved = Case(
-        *[When(pk=pk, then=pos) for pos, pk in enumerate(trending_person_pks)],
-        output_field=IntegerField(),
-    )
+    # Continue after the last person of the previous page
+    start = 0
+    after = request.GET.get("after")
+    if after and after.isdigit() and int(after) in leaderboard:
+        start = leaderboard.index(int(after)) + 1
+    page_pks = leaderboard[start : start + PAGE_SIZE]
+    has_next = start + PAGE_SIZE < len(leaderboard)
 
-    people = Person.objects.filter(pk__in=trending_person_pks).order_by(preserved)
+    # Fetch the actual Person objects in the order of their trending status
+    people_by_pk = await Person.objects.for_cards().ain_bulk(page_pks)
+    people = [people_by_pk[pk] for pk in page_pks if pk in people_by_pk]
 
-    return render(request, "trending.html", {"people": people, "period": period})
+    context = {
+        "people": people,
+        "period": period,
+        "next_cursor": page_pks[-1] if has_next else None,
+    }
+    # Rendering may create thumbnails, which is file and image work
+    return await sync_to_async(_render_cards)(
+        request, "trending.html", context, {"period": period}
+    )
 
 
 def upload_file(request):
@@ -127,48 +234,121 @@ def upload_file(request):
             return redirect(request.path)
 
         if file and file.name.endswith(".json"):
-            try:
-                # Create a temporary file to store the uploaded data
-                with tempfile.NamedTemporaryFile(
-                    delete=False, mode="wb+", suffix=".json"
-                ) as temp_f:
-                    for chunk in file.chunks():
-                        temp_f.write(chunk)
-                    temp_file_path = temp_f.name
-
-                # Call the management command
-                call_command("load_result_data", f"--file={temp_file_path}", "--update")
-                messages.success(request, "File processed successfully!")
-
-            except Exception as e:
-                messages.error(request, f"An error occurred: {e}")
-            finally:
-                if "temp_file_path" in locals() and os.path.exists(temp_file_path):
-                    os.remove(temp_file_path)  # Clean up the temp file
-
+            # Store the upload; the run_import_jobs worker imports it
+            enqueue_import(file)
+            messages.success(
+                request, "File uploaded. The import will run in the background."
+            )
             return redirect("upload_file")
         else:
             messages.error(request, "Invalid file type. Please upload a .json file.")
             return redirect(request.path)
 
-    return render(request, "upload.html")
+    jobs = ImportJob.objects.all()[:10]
+    return render(request, "upload.html", {"jobs": jobs})
 
 
-def bio_chat(request, slug):
-    person = get_object_or_404(Person, slug=slug)
+def import_job_status(request, pk):
+    """Return one job's status row; htmx polls it until the job finishes."""
+    job = get_object_or_404(ImportJob, pk=pk)
+    return render(request, "_import_job.html", {"job": job})
+
+
+def _chat_session_key(person):
+    return f"chat_session:{person.pk}"
+
+
+async def _chat_session(request, person, create=False):
+    """Return the visitor's chat session with ``person``, if any."""
+    key = _chat_session_key(person)
+    pk = await request.session.aget(key)
+    session = None
+    if pk is not None:
+        session = await ChatSession.objects.filter(pk=pk, person=person).afirst()
+    if session is None and create:
+        session = await ChatSession.objects.acreate(person=person)
+        await request.session.aset(key, session.pk)
+    return session
+
+
+def _chat_more_url(person, cursor):
+    if not cursor:
+        return None
+    return (
+        f"{reverse('chat_history', args=[person.slug])}?{urlencode({'before': cursor})}"
+    )
+
+
+def _chat_page_context(person, session, before=None):
+    turns, cursor = [], None
+    if session is not None:
+        turns, cursor = session.turn_page(before=before, limit=CHAT_PAGE_SIZE)
+    return {
+        "person": person,
+        "turns": turns,
+        "chat_more_url": _chat_more_url(person, cursor),
+    }
+
+
+@rate_limit("chat")
+async def bio_chat(request, slug):
+    person = await aget_object_or_404(Person, slug=slug)
 
     if request.method == "POST":
-        message = request.POST.get("message", "")
-        # Echo the message as the response
-        response = message
+        message = request.POST.get("message", "").strip()
+        if not message:
+            return JsonResponse({"error": "Message is required"}, status=400)
+
+        # Stream the reply as Server-Sent Events while it is generated
+        session = await _chat_session(request, person, create=True)
+        response = StreamingHttpResponse(
+            stream_reply(person, message, session), content_type="text/event-stream"
+        )
+        response.headers["Cache-Control"] = "no-cache"
+        # Keep nginx from buffering the stream
+        response.headers["X-Accel-Buffering"] = "no"
+        return response
+
+    # For GET request, render the chat page with the latest turns
+    session = await _chat_session(request, person)
+    context = await sync_to_async(_chat_page_context)(person, session)
+    return await sync_to_async(render)(request, "bio_chat.html", context)
+
+
+async def chat_history(request, slug):
+    """Return the page of turns before ``before`` as an htmx fragment."""
+    person = await aget_object_or_404(Person, slug=slug)
+    before = request.GET.get("before", "")
+    session = await _chat_session(request, person)
+    context = await sync_to_async(_chat_page_context)(
+        person, session, int(before) if before.isdigit() else None
+    )
+    return await sync_to_async(render)(request, "_chat_turns.html", context)
+
+
+def _comments_more_url(person, cursor):
+    if not cursor:
+        return None
+    return (
+        f"{reverse('comment_list', args=[person.slug])}?{urlencode({'after': cursor})}"
+    )
 
-        # Return JSON response
-        return JsonResponse({"response": response})
 
-    # For GET request, render the chat page
-    return render(request, "bio_chat.html", {"person": person})
+def comment_list(request, slug):
+    """Return the next page of comment threads as an htmx fragment."""
+    person = get_object_or_404(Person, slug=slug)
+    comments, cursor = Comment.objects.for_object(person).thread_page(
+        after=request.GET.get("after"), limit=COMMENT_PAGE_SIZE
+    )
+    context = {
+        "person": person,
+        "comments": comments,
+        "comments_more_url": _comments_more_url(person, cursor),
+    }
+    return render(request, "_comments_list.html", context)
 
 
+@rate_limit("comment")
 def add_comment(request, slug):
     if request.method == "POST":
         person = get_object_or_404(Person, slug=slug)
@@ -185,7 +365,7 @@ def add_comment(request, slug):
                 try:
                     parent = Comment.objects.get(pk=parent_id)
                     # Check if reply is allowed (depth < 2)
-                    if parent.get_depth() >= 2:
+                    if parent.depth >= 2:
                         return HttpResponse("Maximum reply depth exceeded", status=400)
                 except Comment.DoesNotExist:
                     pass
@@ -200,16 +380,9 @@ def add_comment(request, slug):
             )
             comment.save()
 
-            # Get updated comments list
-            comments = Comment.objects.filter(
-                content_type=content_type, object_pk=person.pk, is_removed=False
-            ).order_by("-created_at")
-
-            # Return updated comments list
-            context = {
-                "person": person,
-                "comments": comments,
-            }
-            return render(request, "_comments_list.html", context)
+            # Return only the new comment; htmx inserts it into the thread
+            comment.thread_replies = []
+            context = {"person": person, "comment": comment}
+            return render(request, "_comment.html", context)
 
     return HttpResponse("Invalid request", status=400)
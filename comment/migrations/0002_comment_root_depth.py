@@ -0,0 +1,57 @@
+# Generated by Django 6.0 on 2026-10-18 17:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_root_and_depth(apps, schema_editor):
+    Comment = apps.get_model("comment", "Comment")
+
+    parents = dict(Comment.objects.values_list("pk", "parent_id"))
+    changed = []
+    for comment in Comment.objects.exclude(parent=None).only("pk", "parent_id"):
+        depth, root_id = 1, comment.parent_id
+        while parents[root_id] is not None:
+            depth, root_id = depth + 1, parents[root_id]
+        comment.depth, comment.root_id = depth, root_id
+        changed.append(comment)
+    Comment.objects.bulk_update(changed, ["depth", "root"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("comment", "0001_initial"),
+        ("contenttypes", "0002_remove_content_type_name"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="depth",
+            field=models.PositiveSmallIntegerField(
+                default=0, editable=False, verbose_name="depth"
+            ),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="root",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                editable=False,
+                help_text="The top-level comment of this thread, empty for top-level comments.",
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="thread_comments",
+                to="comment.comment",
+                verbose_name="thread root",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["root", "created_at"], name="comments_co_root_id_45b474_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_root_and_depth, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-18 17:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("comment", "0002_comment_root_depth"),
+        ("contenttypes", "0002_remove_content_type_name"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["content_type", "object_pk", "is_removed", "created_at"],
+                name="comments_co_content_b45b3a_idx",
+            ),
+        ),
+    ]
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
@@ -6,6 +8,81 @@ from django.urls import reverse
 from django.utils import timezone
 
 
+class CommentQuerySet(models.QuerySet):
+    def for_object(self, obj):
+        """객체에 달린 (삭제되지 않은) 댓글"""
+        content_type = ContentType.objects.get_for_model(obj)
+        return self.filter(
+            content_type=content_type, object_pk=obj.pk, is_removed=False
+        )
+
+    def thread(self):
+        """
+        댓글을 한 번의 쿼리로 불러와 트리로 구성한다.
+
+        Returns the top-level comments, newest first. Every comment gets a
+        ``thread_replies`` list of its replies, oldest first. Replies whose
+        parent is not part of the queryset are left out.
+        """
+        comments = list(self.order_by("created_at", "pk"))
+        roots = [comment for comment in comments if comment.parent_id is None]
+        _link_replies(roots, comments)
+        roots.reverse()
+        return roots
+
+    def thread_page(self, after=None, limit=20):
+        """
+        최신 원댓글 ``limit``개와 그 답글들을 불러온다.
+
+        Returns ``(roots, next_cursor)`` like ``thread()`` but for one page of
+        top-level comments; pass ``next_cursor`` back as ``after`` for the next
+        page. Replies are fetched by thread root, so a page costs two queries.
+        """
+        roots = self.filter(parent=None).order_by("-created_at", "-pk")
+        position = _decode_cursor(after) if after else None
+        if position:
+            created_at, pk = position
+            roots = roots.filter(
+                models.Q(created_at__lt=created_at)
+                | models.Q(created_at=created_at, pk__lt=pk)
+            )
+        roots = list(roots[: limit + 1])
+
+        next_cursor = None
+        if len(roots) > limit:
+            roots = roots[:limit]
+            next_cursor = _encode_cursor(roots[-1])
+
+        if roots:
+            replies = self.filter(root__in=roots).order_by("created_at", "pk")
+            _link_replies(roots, list(replies))
+        return roots, next_cursor
+
+
+def _link_replies(roots, comments):
+    """Attach each comment to its parent's ``thread_replies``."""
+    by_pk = {comment.pk: comment for comment in roots}
+    by_pk.update((comment.pk, comment) for comment in comments)
+    for comment in by_pk.values():
+        comment.thread_replies = []
+    for comment in comments:
+        if comment.parent_id in by_pk:
+            by_pk[comment.parent_id].thread_replies.append(comment)
+
+
+def _encode_cursor(comment):
+    return f"{comment.created_at.isoformat()}_{comment.pk}"
+
+
+def _decode_cursor(cursor):
+    """Return ``(created_at, pk)`` from a cursor string, or ``None`` if invalid."""
+    created_at, _, pk = cursor.rpartition("_")
+    try:
+        return datetime.fromisoformat(created_at), int(pk)
+    except ValueError:
+        return None
+
+
 class Comment(models.Model):
     """
     모든 모델을 위한 댓글 모델
@@ -47,17 +124,44 @@ class Comment(models.Model):
         related_name="replies",
         on_delete=models.CASCADE,
     )
+    # 부모 댓글로부터 저장 시점에 계산되는 값
+    root = models.ForeignKey(
+        "self",
+        verbose_name="thread root",
+        blank=True,
+        null=True,
+        related_name="thread_comments",
+        on_delete=models.CASCADE,
+        editable=False,
+        db_index=False,
+        help_text="The top-level comment of this thread, empty for top-level comments.",
+    )
+    depth = models.PositiveSmallIntegerField("depth", default=0, editable=False)
+
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         db_table = "comments_comment"
         ordering = ("created_at",)
         verbose_name = "comment"
         verbose_name_plural = "comments"
+        indexes = [
+            models.Index(fields=["root", "created_at"]),
+            models.Index(
+                fields=["content_type", "object_pk", "is_removed", "created_at"]
+            ),
+        ]
 
     def __str__(self):
         return "%s: %s..." % (self.name, self.comment[:50])
 
     def save(self, *args, **kwargs):
+        if self.parent_id is None:
+            self.root = None
+            self.depth = 0
+        else:
+            self.root_id = self.parent.root_id or self.parent_id
+            self.depth = self.parent.depth + 1
         if not self.is_reply_allowed():
             raise ValueError("Reply is only allowed up to 2 levels")
         super().save(*args, **kwargs)
@@ -69,12 +173,7 @@ class Comment(models.Model):
 
     def get_depth(self):
         """댓글의 깊이를 반환 (0: 원댓글, 1: 대댓글, 2: 대대댓글)"""
-        depth = 0
-        current = self
-        while current.parent:
-            depth += 1
-            current = current.parent
-        return depth
+        return self.depth
 
     def is_reply_allowed(self):
         """대댓글이 허용되는지 확인 (2단계까지만 허용)"""
@@ -1,3 +1,147 @@
-from django.test import TestCase
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from bio.models import Person
+from .models import Comment
+
+
+class CommentThreadTests(TestCase):
+    def setUp(self):
+        self.person = Person.objects.create(name="Test Person")
+        self.content_type = ContentType.objects.get_for_model(Person)
+
+    def add(self, text, parent=None, **kwargs):
+        return Comment.objects.create(
+            content_type=self.content_type,
+            object_pk=self.person.pk,
+            user_name="tester",
+            comment=text,
+            parent=parent,
+            **kwargs,
+        )
+
+    def test_thread_is_loaded_in_one_query(self):
+        """Test that the whole thread comes from a single query."""
+        first = self.add("first")
+        reply = self.add("reply", parent=first)
+        nested = self.add("nested", parent=reply)
+        second = self.add("second")
+
+        with self.assertNumQueries(1):
+            roots = Comment.objects.for_object(self.person).thread()
+            self.assertEqual(roots, [second, first])
+            self.assertEqual(roots[1].thread_replies, [reply])
+            self.assertEqual(roots[1].thread_replies[0].thread_replies, [nested])
+            loaded_reply = roots[1].thread_replies[0]
+            loaded_nested = loaded_reply.thread_replies[0]
+            self.assertEqual(
+                [roots[1].depth, loaded_reply.depth, loaded_nested.depth], [0, 1, 2]
+            )
+
+    def test_save_stores_root_and_depth(self):
+        """Test that replies record their thread root and depth."""
+        first = self.add("first")
+        reply = self.add("reply", parent=first)
+        nested = self.add("nested", parent=reply)
+
+        self.assertEqual((first.root_id, first.depth), (None, 0))
+        self.assertEqual((reply.root_id, reply.depth), (first.pk, 1))
+        self.assertEqual((nested.root_id, nested.depth), (first.pk, 2))
+        self.assertEqual(list(Comment.objects.filter(root=first)), [reply, nested])
+
+    def test_depth_check_reads_the_parent_column(self):
+        """Test that validating a reply does not walk the parent chain."""
+        nested = self.add("nested", parent=self.add("reply", parent=self.add("first")))
+        nested = Comment.objects.get(pk=nested.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(nested.get_depth(), 2)
+        with self.assertRaises(ValueError):
+            self.add("too deep", parent=nested)
+
+    def test_removed_comments_hide_their_replies(self):
+        """Test that replies to a removed comment are left out."""
+        first = self.add("first")
+        removed = self.add("removed", parent=first, is_removed=True)
+        self.add("orphan", parent=removed)
+
+        roots = Comment.objects.for_object(self.person).thread()
+        self.assertEqual(roots, [first])
+        self.assertEqual(roots[0].thread_replies, [])
+
+    @override_settings(CLICK_RECORDING_MODE="sync")
+    def test_bio_page_queries_do_not_grow_with_thread(self):
+        """Test that rendering more comments does not issue more queries."""
+        url = reverse("bio_detail", args=[self.person.slug])
+        first = self.add("first")
+        self.client.get(url)  # creates the click rollup bucket
+        with CaptureQueriesContext(connection) as small_thread:
+            self.client.get(url)
+
+        for i in range(5):
+            reply = self.add(f"reply {i}", parent=first)
+            self.add(f"nested {i}", parent=reply)
+        with CaptureQueriesContext(connection) as large_thread:
+            response = self.client.get(url)
+
+        self.assertContains(response, "nested 4")
+        self.assertEqual(len(large_thread), len(small_thread))
+
+
+@override_settings(CLICK_RECORDING_MODE="sync")
+class CommentPaginationTests(TestCase):
+    def setUp(self):
+        self.person = Person.objects.create(name="Test Person")
+        self.content_type = ContentType.objects.get_for_model(Person)
+
+    def add(self, text, parent=None):
+        return Comment.objects.create(
+            content_type=self.content_type,
+            object_pk=self.person.pk,
+            user_name="tester",
+            comment=text,
+            parent=parent,
+        )
+
+    def test_thread_page_continues_after_cursor(self):
+        """Test that pages of top-level comments come newest first."""
+        first, second, third = self.add("1"), self.add("2"), self.add("3")
+        reply = self.add("reply", parent=first)
+        comments = Comment.objects.for_object(self.person)
+
+        with self.assertNumQueries(2):
+            roots, cursor = comments.thread_page(limit=2)
+        self.assertEqual(roots, [third, second])
+
+        roots, cursor = comments.thread_page(after=cursor, limit=2)
+        self.assertEqual(roots, [first])
+        self.assertEqual(roots[0].thread_replies, [reply])
+        self.assertIsNone(cursor)
+
+    @patch("bio.views.COMMENT_PAGE_SIZE", 1)
+    def test_comment_list_serves_next_page(self):
+        """Test that the load-more endpoint renders the following threads."""
+        self.add("Earlier thread")
+        self.add("Later thread")
+        response = self.client.get(reverse("bio_detail", args=[self.person.slug]))
+        self.assertContains(response, "Later thread")
+        self.assertNotContains(response, "Earlier thread")
+
+        response = self.client.get(response.context["comments_more_url"])
+        self.assertTemplateUsed(response, "_comments_list.html")
+        self.assertContains(response, "Earlier thread")
+
+    def test_add_comment_returns_only_the_new_comment(self):
+        """Test that posting renders just the new comment fragment."""
+        self.add("existing")
+        response = self.client.post(
+            reverse("add_comment", args=[self.person.slug]),
+            {"user_name": "tester", "comment": "brand new"},
+        )
+        self.assertTemplateUsed(response, "_comment.html")
+        self.assertNotContains(response, "existing")
+        self.assertContains(response, "brand new")
@@ -0,0 +1,25 @@
+"""
+Per-connection database setup.
+
+``configure_sqlite`` is connected to ``connection_created`` and applies
+``SQLITE_PRAGMAS`` to every new SQLite connection, since most PRAGMAs (unlike
+``journal_mode``) only last for the connection they run on.
+"""
+
+import re
+
+from django.conf import settings
+
+PRAGMA_NAME_RE = re.compile(r"^[a-z_]+$")
+PRAGMA_VALUE_RE = re.compile(r"^-?\w+$")
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", {})
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            if not PRAGMA_NAME_RE.match(name) or not PRAGMA_VALUE_RE.match(str(value)):
+                raise ValueError(f"Invalid SQLite PRAGMA: {name} = {value}")
+            cursor.execute(f"PRAGMA {name} = {value}")
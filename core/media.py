@@ -0,0 +1,178 @@
+"""
+Serving of uploaded media files.
+
+Unlike ``django.views.static.serve`` this supports single byte ranges (so
+``<video>`` can seek), ETag/Last-Modified revalidation, and handing the file
+transfer to the front-end server with ``MEDIA_SENDFILE``:
+
+* ``None``: Django streams the file itself.
+* ``"x-accel-redirect"``: nginx serves ``MEDIA_SENDFILE_PREFIX + path`` from
+  an ``internal`` location aliased to ``MEDIA_ROOT``.
+* ``"x-sendfile"``: Apache mod_xsendfile (or lighttpd) serves the absolute
+  file path.
+
+The offloading server handles ranges itself, so the worker returns at once
+instead of staying busy for the whole download.
+
+When Django streams the file under ASGI, the body is an async generator that
+reads one chunk at a time in a thread. Django's ASGI handler would otherwise
+read a synchronous iterator (including ``FileResponse``) into memory in full
+before sending the first byte.
+"""
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _parse_range(header, size):
+    """
+    Return ``(start, end)`` (inclusive) for a single byte range, ``None`` to
+    send the whole file, or ``False`` if the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.replace(" ", ""))
+    if not match or match.groups() == ("", ""):
+        # Malformed, or several ranges: answer with the full file
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if start > end:
+            return False if start >= size else None
+    else:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        start, end = max(size - length, 0), size - 1
+    if start >= size:
+        return False
+    return start, end
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.headers.get("If-Range")
+    if if_range is None:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def _read_range(path, start, length):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+async def _aread_range(path, start, length):
+    f = await sync_to_async(open)(path, "rb")
+    try:
+        await sync_to_async(f.seek)(start)
+        while length > 0:
+            chunk = await sync_to_async(f.read)(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        await sync_to_async(f.close)()
+
+
+def _sendfile_response(path, name):
+    mode = getattr(settings, "MEDIA_SENDFILE", None)
+    if not mode:
+        return None
+    response = HttpResponse()
+    if mode == "x-accel-redirect":
+        prefix = getattr(settings, "MEDIA_SENDFILE_PREFIX", "/protected-media/")
+        response.headers["X-Accel-Redirect"] = prefix + quote(name)
+    elif mode == "x-sendfile":
+        response.headers["X-Sendfile"] = path
+    else:
+        raise ValueError(f"Unknown MEDIA_SENDFILE mode: {mode}")
+    # The front-end server fills in the body and its type
+    del response.headers["Content-Type"]
+    return response
+
+
+def _file_response(request, path, size, etag, last_modified):
+    content_type, encoding = mimetypes.guess_type(path)
+    content_type = content_type or "application/octet-stream"
+
+    byte_range = None
+    if "Range" in request.headers and _if_range_matches(request, etag, last_modified):
+        byte_range = _parse_range(request.headers["Range"], size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response.headers["Content-Range"] = f"bytes */{size}"
+        return response
+    is_asgi = isinstance(request, ASGIRequest)
+    if byte_range is None and not is_asgi:
+        # FileResponse lets the WSGI server use sendfile() where it can
+        response = FileResponse(open(path, "rb"), content_type=content_type)
+    else:
+        start, end = byte_range or (0, size - 1)
+        length = end - start + 1
+        read = _aread_range if is_asgi else _read_range
+        response = StreamingHttpResponse(
+            read(path, start, length),
+            status=200 if byte_range is None else 206,
+            content_type=content_type,
+        )
+        response.headers["Content-Length"] = str(length)
+        if byte_range is not None:
+            response.headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Invalid path")
+    try:
+        stat = os.stat(full_path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404("File not found")
+    if not os.path.isfile(full_path):
+        raise Http404("File not found")
+
+    size = stat.st_size
+    last_modified = int(stat.st_mtime)
+    etag = quote_etag(f"{stat.st_mtime_ns:x}-{size:x}")
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _sendfile_response(full_path, path)
+    if response is None:
+        response = _file_response(request, full_path, size, etag, last_modified)
+    response.headers["ETag"] = etag
+    response.headers["Last-Modified"] = http_date(last_modified)
+    response.headers["Accept-Ranges"] = "bytes"
+    return response
@@ -10,7 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 from .secret import SECRET_KEY
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -74,12 +76,60 @@ WSGI_APPLICATION = "core.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# VIO_DB_PROFILE selects the database setup:
+#   sqlite       SQLite in WAL mode, tuned for concurrent reads and click writes
+#   sqlite-basic SQLite with its default rollback journal (for benchmarks)
+#   postgres     PostgreSQL with persistent connections, or psycopg's pool when
+#                VIO_DB_POOL=1 (needs psycopg[pool])
+DB_PROFILE = os.environ.get("VIO_DB_PROFILE", "sqlite")
+
+if DB_PROFILE in ("sqlite", "sqlite-basic"):
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("VIO_DB_NAME", BASE_DIR / "db.sqlite3"),
+        }
     }
-}
+elif DB_PROFILE == "postgres":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("VIO_DB_NAME", "vio"),
+            "USER": os.environ.get("VIO_DB_USER", "vio"),
+            "PASSWORD": os.environ.get("VIO_DB_PASSWORD", ""),
+            "HOST": os.environ.get("VIO_DB_HOST", "localhost"),
+            "PORT": os.environ.get("VIO_DB_PORT", "5432"),
+            "CONN_MAX_AGE": int(os.environ.get("VIO_DB_CONN_MAX_AGE", 60)),
+            "CONN_HEALTH_CHECKS": True,
+        }
+    }
+    if os.environ.get("VIO_DB_POOL") == "1":
+        # The pool replaces persistent connections
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"] = {
+            "pool": {
+                "min_size": 2,
+                "max_size": int(os.environ.get("VIO_DB_POOL_SIZE", 10)),
+            }
+        }
+else:
+    raise ImproperlyConfigured(f"Unknown VIO_DB_PROFILE: {DB_PROFILE}")
+
+# PRAGMAs run on every new SQLite connection (core/db.py)
+if DB_PROFILE == "sqlite":
+    # Take the write lock when a transaction starts instead of failing to
+    # upgrade a read lock while another connection writes
+    DATABASES["default"]["OPTIONS"] = {"transaction_mode": "IMMEDIATE"}
+    SQLITE_PRAGMAS = {
+        # Readers no longer block the writer, and commits skip an fsync
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": int(os.environ.get("VIO_SQLITE_BUSY_TIMEOUT", 5000)),  # ms
+        "mmap_size": int(os.environ.get("VIO_SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+        "temp_store": "MEMORY",
+    }
+else:
+    SQLITE_PRAGMAS = {"journal_mode": "DELETE"}
 
 
 # Password validation
@@ -131,3 +181,80 @@ STATIC_URL = "static/"
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+
+# How media files are sent (core/media.py): None streams them from Django;
+# "x-accel-redirect" (nginx, internal location at MEDIA_SENDFILE_PREFIX) or
+# "x-sendfile" (Apache/lighttpd) hand the transfer to the front-end server.
+MEDIA_SENDFILE = None
+MEDIA_SENDFILE_PREFIX = "/protected-media/"
+
+# Dotted path of the poster frame extractor for evidence videos (bio/video.py),
+# or None to skip posters. The default needs an ffmpeg binary on PATH.
+VIDEO_POSTER_EXTRACTOR = "bio.video.ffmpeg_poster"
+
+# Encoder quality of the resized WebP/JPEG images under MEDIA_ROOT/thumbs
+THUMBNAIL_QUALITY = 80
+
+# Uploaded import files waiting for the run_import_jobs worker (not public)
+IMPORT_ROOT = BASE_DIR / "imports"
+# Seconds after which a job still "running" is claimed again (its worker died)
+IMPORT_JOB_TIMEOUT = 60 * 60
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "vio",
+    }
+}
+
+
+# Click recording
+# "sync" writes one PersonClick per view, "buffered" batches them per worker.
+
+CLICK_RECORDING_MODE = "buffered"
+CLICK_BUFFER_SIZE = 500
+CLICK_FLUSH_INTERVAL = 10  # seconds
+
+
+# Rate limiting (bio/ratelimit.py)
+# Token bucket per client IP and endpoint: (requests, seconds) allows bursts of
+# `requests` that refill evenly over `seconds`. Clients over the click limit
+# still get the page, but their views are not counted.
+
+RATE_LIMITS = {
+    "comment": (5, 60),
+    "chat": (10, 60),
+    "click": (60, 60),
+}
+RATE_LIMIT_IP_HEADER = None  # e.g. "HTTP_X_REAL_IP" behind nginx
+# User-Agents matching this (case-insensitive) are not counted as clicks
+BOT_USER_AGENT_RE = (
+    r"bot|crawl|spider|slurp|archiver|facebookexternalhit|headless"
+    r"|curl|wget|python-requests|python-urllib|httpx|aiohttp|go-http-client"
+)
+
+
+# Trending leaderboard
+
+TRENDING_CACHE_TTL = 300  # seconds
+TRENDING_LIMIT = 50
+
+
+# Timeline event list fragment cache
+
+EVENT_FRAGMENT_CACHE_TTL = 60 * 60 * 24  # seconds
+
+
+# Chat
+# Async generator function that streams bio_chat replies (bio/chat.py)
+
+CHAT_RESPONDER = "bio.chat.stub_responder"
+CHAT_STUB_DELAY = 0.05  # seconds between stub tokens
+CHAT_PASSAGES = 5  # retrieved passages passed to the responder
+CHAT_HISTORY_TURNS = 10  # recent turns passed verbatim; older ones are summarized
+CHAT_SUMMARY_LENGTH = 2000  # characters kept in a session's running summary
+CHAT_SESSION_TTL_DAYS = 30  # idle days before prune_chat_sessions deletes a session
@@ -1,9 +1,10 @@
+import re
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
 from django.conf.urls.i18n import i18n_patterns
 from bio import views
+from core.media import serve_media
 
 # These URLs will not have a language prefix
 urlpatterns = [
@@ -17,8 +18,16 @@ urlpatterns += i18n_patterns(
     path("explore/", views.explore, name="explore"),
     path("trending/", views.trending, name="trending"),
     path("upload/", views.upload_file, name="upload_file"),
+    path("upload/jobs/<int:pk>/", views.import_job_status, name="import_job_status"),
     path("bio/", include("bio.urls")),
 )
 
-# Media files serving for development
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Uploaded media, with byte ranges and optional X-Accel-Redirect/X-Sendfile
+if settings.MEDIA_URL.startswith("/"):
+    urlpatterns += [
+        re_path(
+            rf"^{re.escape(settings.MEDIA_URL.lstrip('/'))}(?P<path>.+)$",
+            serve_media,
+            name="media",
+        ),
+    ]